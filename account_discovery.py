@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Account discovery - find the active campaigns and ad sets that carry a daily budget
+Shared by budget_scheduler.py, budget_scheduler_v2.py and manage_scheduler.py
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from facebook_business.adobjects.campaign import Campaign
+
+# Ad set fields with the parent campaign expanded inline, so one
+# paginated account-level call replaces the per-campaign get_ad_sets loop
+ADSET_FIELDS = [
+    'id',
+    'name',
+    'status',
+    'daily_budget',
+    'lifetime_budget',
+    'campaign{id,name,daily_budget}',
+]
+
+CAMPAIGN_FIELDS = ['id', 'name', 'status', 'daily_budget', 'lifetime_budget']
+
+# Fields kept in the account snapshot used by delta discovery
+SNAPSHOT_ADSET_FIELDS = [
+    'id',
+    'name',
+    'daily_budget',
+    'effective_status',
+    'updated_time',
+    'campaign{id,name,daily_budget}',
+]
+
+SNAPSHOT_CAMPAIGN_FIELDS = ['id', 'name', 'daily_budget', 'effective_status', 'updated_time']
+
+# Delta queries must also see objects that stopped delivering, so they can be dropped
+DELTA_STATUSES = [
+    'ACTIVE', 'PAUSED', 'CAMPAIGN_PAUSED', 'ADSET_PAUSED', 'ARCHIVED', 'DELETED',
+    'IN_PROCESS', 'WITH_ISSUES', 'PENDING_REVIEW', 'DISAPPROVED', 'PREAPPROVED',
+    'PENDING_BILLING_INFO',
+]
+
+# Re-read objects updated this many seconds before the watermark (clock/indexing slack)
+DELTA_OVERLAP_SECONDS = 120
+
+
+def fetch_active_adsets(account, page_size=500):
+    """
+    Fetch every active ad set in the account with its campaign in one paginated call
+
+    Returns a list of dicts with 'adset' and 'campaign' keys (campaign holds
+    id, name and daily_budget as returned by the field expansion).
+    """
+    adsets = account.get_ad_sets(
+        fields=ADSET_FIELDS,
+        params={'effective_status': ['ACTIVE'], 'limit': page_size}
+    )
+
+    rows = []
+    for adset in adsets:
+        campaign = adset.get('campaign') or {}
+        rows.append({
+            'adset': adset,
+            'campaign': {
+                'id': campaign.get('id'),
+                'name': campaign.get('name'),
+                'daily_budget': campaign.get('daily_budget')
+            }
+        })
+
+    return rows
+
+
+def classify_budget_objects(rows, config, verbose=True):
+    """
+    Split fetched ad sets into campaign-level (CBO) and ad set-level (ABO) budgets
+
+    Applies excluded_campaigns / excluded_adsets from config in memory and
+    returns the same structure as BudgetScheduler.get_active_campaigns_and_adsets.
+    """
+    results = {
+        'campaign_budgets': [],  # Campaigns with budget at campaign level
+        'adset_budgets': []      # Ad sets with budget at ad set level
+    }
+
+    seen_campaigns = set()
+    skipped_campaigns = set()
+
+    for row in rows:
+        adset = row['adset']
+        campaign = row['campaign']
+        campaign_id = campaign['id']
+        campaign_name = campaign['name']
+
+        # Check if excluded
+        if campaign_id in config['excluded_campaigns']:
+            if verbose and campaign_id not in skipped_campaigns:
+                print(f"  ⏭️  Skipping excluded campaign: {campaign_name}")
+            skipped_campaigns.add(campaign_id)
+            continue
+
+        # If campaign has budget set at campaign level
+        if campaign['daily_budget']:
+            if campaign_id not in seen_campaigns:
+                seen_campaigns.add(campaign_id)
+                results['campaign_budgets'].append({
+                    'id': campaign_id,
+                    'name': campaign_name,
+                    'current_budget': int(campaign['daily_budget']),
+                    'type': 'campaign'
+                })
+            continue
+
+        adset_id = adset.get('id')
+        adset_name = adset.get('name')
+        adset_daily_budget = adset.get('daily_budget')
+
+        # Check if excluded
+        if adset_id in config['excluded_adsets']:
+            if verbose:
+                print(f"  ⏭️  Skipping excluded ad set: {adset_name}")
+            continue
+
+        if adset_daily_budget:
+            results['adset_budgets'].append({
+                'id': adset_id,
+                'name': adset_name,
+                'campaign_id': campaign_id,
+                'campaign_name': campaign_name,
+                'current_budget': int(adset_daily_budget),
+                'type': 'adset'
+            })
+
+    return results
+
+
+def fetch_per_campaign(account, config, verbose=True):
+    """Legacy discovery: list active campaigns, then fetch ad sets campaign by campaign"""
+    campaigns = account.get_campaigns(
+        fields=CAMPAIGN_FIELDS,
+        params={'effective_status': ['ACTIVE']}
+    )
+
+    rows = []
+    for campaign in campaigns:
+        campaign_info = {
+            'id': campaign.get('id'),
+            'name': campaign.get('name'),
+            'daily_budget': campaign.get('daily_budget')
+        }
+
+        # CBO campaigns are classified without looking at their ad sets
+        if campaign_info['daily_budget'] or campaign_info['id'] in config['excluded_campaigns']:
+            rows.append({'adset': {}, 'campaign': campaign_info})
+            continue
+
+        adsets = Campaign(campaign_info['id']).get_ad_sets(
+            fields=CAMPAIGN_FIELDS,
+            params={'effective_status': ['ACTIVE']}
+        )
+        for adset in adsets:
+            rows.append({'adset': adset, 'campaign': campaign_info})
+
+    return classify_budget_objects(rows, config, verbose)
+
+
+def parse_updated_time(value):
+    """Graph API updated_time ('2025-12-01T10:00:00-0800') -> unix seconds"""
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z').timestamp()
+
+
+class AccountSnapshot:
+    """
+    Local copy of the account structure (ids, names, budgets, updated_time)
+
+    refresh() pulls only campaigns and ad sets whose updated_time is newer
+    than the snapshot's watermark and merges them in. A full fetch happens
+    when there is no snapshot yet or it is older than max_age_hours.
+    """
+
+    def __init__(self, account, path='account_snapshot.json', max_age_hours=24):
+        self.account = account
+        self.path = path
+        self.max_age_hours = max_age_hours
+        self.data = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        """Bring the snapshot up to date and return it"""
+        now = time.time()
+        if not self.data or now - self.data['full_fetched_at'] > self.max_age_hours * 3600:
+            self.full_fetch(now)
+        else:
+            self.delta_fetch()
+        self.save()
+        return self.data
+
+    def full_fetch(self, now):
+        print("  🔄 Full account snapshot fetch...")
+        adsets = self.account.get_ad_sets(
+            fields=SNAPSHOT_ADSET_FIELDS,
+            params={'effective_status': ['ACTIVE'], 'limit': 500}
+        )
+
+        self.data = {'full_fetched_at': now, 'watermark': 0, 'adsets': {}, 'campaigns': {}}
+        for adset in adsets:
+            self._upsert_adset(adset)
+
+    def delta_fetch(self):
+        since = int(self.data['watermark'] - DELTA_OVERLAP_SECONDS)
+        filtering = [{'field': 'updated_time', 'operator': 'GREATER_THAN', 'value': since}]
+
+        campaigns = list(self.account.get_campaigns(
+            fields=SNAPSHOT_CAMPAIGN_FIELDS,
+            params={'effective_status': DELTA_STATUSES, 'filtering': filtering, 'limit': 500}
+        ))
+        adsets = list(self.account.get_ad_sets(
+            fields=SNAPSHOT_ADSET_FIELDS,
+            params={'effective_status': DELTA_STATUSES, 'filtering': filtering, 'limit': 500}
+        ))
+        print(f"  🔄 Delta snapshot fetch: {len(campaigns)} campaign(s), {len(adsets)} ad set(s) changed")
+
+        for campaign in campaigns:
+            self._apply_campaign(campaign)
+        for adset in adsets:
+            self._upsert_adset(adset)
+
+    def _apply_campaign(self, campaign):
+        """Propagate a changed campaign to its ad sets in the snapshot"""
+        campaign_id = campaign.get('id')
+        self._bump_watermark(campaign.get('updated_time'))
+        was_known = campaign_id in self.data['campaigns']
+
+        if campaign.get('effective_status') != 'ACTIVE':
+            # Paused/deleted campaign: its ad sets stop delivering without changing themselves
+            self.data['campaigns'].pop(campaign_id, None)
+            self.data['adsets'] = {
+                adset_id: adset for adset_id, adset in self.data['adsets'].items()
+                if adset['campaign']['id'] != campaign_id
+            }
+            return
+
+        info = {
+            'id': campaign_id,
+            'name': campaign.get('name'),
+            'daily_budget': campaign.get('daily_budget')
+        }
+        self.data['campaigns'][campaign_id] = info
+        for adset in self.data['adsets'].values():
+            if adset['campaign']['id'] == campaign_id:
+                adset['campaign'] = dict(info)
+
+        if not was_known:
+            # Re-activated campaign: its untouched ad sets never show up in the ad set delta
+            adsets = Campaign(campaign_id).get_ad_sets(
+                fields=SNAPSHOT_ADSET_FIELDS,
+                params={'effective_status': ['ACTIVE']}
+            )
+            for adset in adsets:
+                self._upsert_adset(adset)
+
+    def _upsert_adset(self, adset):
+        adset_id = adset.get('id')
+        self._bump_watermark(adset.get('updated_time'))
+
+        if adset.get('effective_status') != 'ACTIVE':
+            self.data['adsets'].pop(adset_id, None)
+            return
+
+        campaign = adset.get('campaign') or {}
+        campaign_info = {
+            'id': campaign.get('id'),
+            'name': campaign.get('name'),
+            'daily_budget': campaign.get('daily_budget')
+        }
+        self.data['campaigns'][campaign_info['id']] = campaign_info
+        self.data['adsets'][adset_id] = {
+            'id': adset_id,
+            'name': adset.get('name'),
+            'daily_budget': adset.get('daily_budget'),
+            'campaign': campaign_info
+        }
+
+    def _bump_watermark(self, updated_time):
+        if updated_time:
+            self.data['watermark'] = max(self.data['watermark'], parse_updated_time(updated_time))
+
+    def rows(self):
+        """Snapshot ad sets in the fetch_active_adsets row format"""
+        return [
+            {'adset': adset, 'campaign': adset['campaign']}
+            for adset in self.data['adsets'].values()
+        ]
+
+
+def open_snapshot(account, config):
+    """AccountSnapshot at the configured path (loaded from disk once)"""
+    return AccountSnapshot(
+        account,
+        config.get('account_snapshot_path', 'account_snapshot.json'),
+        config.get('snapshot_max_age_hours', 24)
+    )
+
+
+def fetch_delta(account, config, verbose=True, snapshot=None):
+    """
+    Delta discovery: refresh the local account snapshot, then classify it
+
+    Long-running callers pass their own snapshot to keep it in memory
+    between runs instead of re-reading the file.
+    """
+    snapshot = snapshot or open_snapshot(account, config)
+    snapshot.refresh()
+    return classify_budget_objects(snapshot.rows(), config, verbose)
+
+
+def get_budget_objects(account, config, verbose=True, snapshot=None):
+    """
+    Fetch and classify active budget objects
+
+    config['discovery_mode'] selects 'account' (single account-level ad set
+    query, the default), 'delta' (only objects updated since the last run,
+    merged into a local snapshot) or 'per_campaign' (one get_ad_sets call
+    per campaign).
+    """
+    mode = config.get('discovery_mode', 'account')
+    if mode == 'per_campaign':
+        return fetch_per_campaign(account, config, verbose)
+    if mode == 'delta':
+        return fetch_delta(account, config, verbose, snapshot)
+
+    return classify_budget_objects(fetch_active_adsets(account), config, verbose)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Ad account list - config-driven accounts for the scheduler and downloader
+
+config.json:
+    "accounts": [
+        {"id": "act_24590952", "name": "Main"},
+        {"id": "act_123", "name": "Second", "overrides": {"budgets": {"nightly_amount": 3000}}}
+    ]
+
+The first account is the primary one and keeps the original file locations
+(budget_state.json, account_snapshot.json, data/). Every other account gets
+its own namespace: budget_state_<id>.json, account_snapshot_<id>.json and
+data/<id>/. Without an "accounts" list the primary account is used alone.
+"""
+
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_ACCOUNT_ID = 'act_24590952'
+
+
+def get_accounts(config):
+    """Configured accounts, falling back to the primary account"""
+    return config.get('accounts') or [{'id': DEFAULT_ACCOUNT_ID, 'name': 'Main'}]
+
+
+def is_primary(config, account_id):
+    return get_accounts(config)[0]['id'] == account_id
+
+
+def namespaced_path(config, account_id, path):
+    """budget_state.json -> budget_state_<id>.json for non-primary accounts"""
+    if is_primary(config, account_id):
+        return path
+    stem, dot, ext = path.rpartition('.')
+    return f"{stem}_{account_id}.{ext}" if dot else f"{path}_{account_id}"
+
+
+def data_dir_for(config, account_id, data_dir='data'):
+    """data/ for the primary account, data/<id>/ for the others"""
+    if is_primary(config, account_id):
+        return data_dir
+    return f"{data_dir}/{account_id}"
+
+
+def account_config(config, account):
+    """Config for one account: the shared config with the account's overrides merged in"""
+    merged = copy.deepcopy(config)
+    for key, value in account.get('overrides', {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = value
+
+    merged['account_snapshot_path'] = namespaced_path(
+        config, account['id'], config.get('account_snapshot_path', 'account_snapshot.json')
+    )
+    return merged
+
+
+def run_per_account(accounts, task, max_workers=4):
+    """
+    Run task(account) for every account on a worker pool
+
+    Returns a list of (account, result, error) in account order; a failing
+    account does not stop the others.
+    """
+    def run(account):
+        try:
+            return account, task(account), None
+        except Exception as e:
+            print(f"❌ [{account.get('name', account['id'])}] {str(e)}")
+            return account, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(accounts)))) as pool:
+        return list(pool.map(run, accounts))
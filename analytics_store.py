@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Local analytics store - every downloaded report in one indexed SQLite database
+
+Ingests data/ad_overview_*, data/ad_by_*_* and data/appsflyer_fb_* CSVs into
+one table per report type, keyed by report_date / campaign_id / adset_id / ad_id.
+Ingest is incremental: files already loaded (same size and mtime) are skipped,
+changed files are replaced.
+
+Usage:
+    python analytics_store.py ingest                 # load new/changed files
+    python analytics_store.py spend-by-adset [days]  # spend by ad set (default 30 days)
+    python analytics_store.py daily-totals [days]    # account totals per day
+"""
+
+import os
+import csv
+import sys
+import glob
+import sqlite3
+from datetime import datetime, timedelta
+from report_schema import report_file_parts, is_text_column, to_value
+
+DATA_DIR = 'data'
+DB_PATH = os.path.join(DATA_DIR, 'analytics.db')
+
+# CSV file prefix -> table name
+REPORT_TABLES = {
+    'ad_overview': 'fb_ad_overview',
+    'ad_by_age': 'fb_ad_by_age',
+    'ad_by_gender': 'fb_ad_by_gender',
+    'ad_by_placement': 'fb_ad_by_placement',
+    'appsflyer_fb': 'appsflyer_fb',
+}
+
+# Key columns indexed (together with report_date) when a table has them
+KEY_COLUMNS = ('campaign_id', 'adset_id', 'ad_id')
+
+
+
+def quote(name):
+    """Quote an identifier (CSV headers contain dots and spaces)"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class AnalyticsStore:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ingested_files (
+                path TEXT PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                report_date TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                rows INTEGER NOT NULL,
+                ingested_at TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def column_names(self, table):
+        """Columns of a table in the order they were added (empty if it does not exist yet)"""
+        return [row['name'] for row in self.conn.execute(f"PRAGMA table_info({quote(table)})")]
+
+    def table_columns(self, table):
+        """Existing columns of a table (empty set if it does not exist yet)"""
+        return set(self.column_names(table))
+
+    def ensure_table(self, table, columns):
+        """Create the table / add new columns as report schemas grow"""
+        existing = self.table_columns(table)
+
+        if not existing:
+            self.conn.execute(
+                f"CREATE TABLE {quote(table)} (report_date TEXT NOT NULL, source_file TEXT NOT NULL)"
+            )
+            self.conn.execute(
+                f"CREATE INDEX {quote('idx_' + table + '_source')} ON {quote(table)} (source_file)"
+            )
+            existing = {'report_date', 'source_file'}
+
+        for column in columns:
+            if column not in existing:
+                col_type = 'TEXT' if is_text_column(column) else 'NUMERIC'
+                self.conn.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {col_type}")
+                existing.add(column)
+
+        # Date plus object keys for "by ad set over N days" style queries
+        for key in KEY_COLUMNS:
+            if key in existing:
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {quote('idx_' + table + '_' + key)} "
+                    f"ON {quote(table)} ({quote(key)}, report_date)"
+                )
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote('idx_' + table + '_date')} ON {quote(table)} (report_date)"
+        )
+
+    def needs_ingest(self, path, stat):
+        row = self.conn.execute(
+            "SELECT size, mtime FROM ingested_files WHERE path = ?", (path,)
+        ).fetchone()
+        return row is None or row['size'] != stat.st_size or row['mtime'] != stat.st_mtime
+
+    def ingest_file(self, path):
+        """Load one report CSV, replacing any rows from an earlier version of the file"""
+        parts = report_file_parts(path)
+        if not parts or parts[0] not in REPORT_TABLES:
+            return 0
+
+        table = REPORT_TABLES[parts[0]]
+        date_str = parts[1]
+        report_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+        stat = os.stat(path)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            columns = [col for col in (reader.fieldnames or []) if col]
+
+            with self.conn:
+                self.ensure_table(table, columns)
+                self.conn.execute(f"DELETE FROM {quote(table)} WHERE source_file = ?", (path,))
+
+                insert = (
+                    f"INSERT INTO {quote(table)} (report_date, source_file, "
+                    + ", ".join(quote(col) for col in columns)
+                    + ") VALUES (?, ?, " + ", ".join('?' for _ in columns) + ")"
+                )
+                rows = self.conn.executemany(insert, (
+                    [report_date, path] + [to_value(col, record.get(col)) for col in columns]
+                    for record in reader
+                )).rowcount
+
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO ingested_files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (path, table, report_date, stat.st_size, stat.st_mtime, rows,
+                     datetime.now().isoformat())
+                )
+
+        return rows
+
+    def ingest(self, data_dir=DATA_DIR):
+        """Ingest every new or changed report CSV in data_dir"""
+        loaded_files = 0
+        loaded_rows = 0
+        skipped = 0
+
+        for path in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+            stat = os.stat(path)
+            if not self.needs_ingest(path, stat):
+                skipped += 1
+                continue
+
+            rows = self.ingest_file(path)
+            if rows:
+                loaded_files += 1
+                loaded_rows += rows
+
+        print(f"✅ Ingested {loaded_files} file(s), {loaded_rows} row(s) ({skipped} unchanged file(s) skipped)")
+        return loaded_files
+
+    def query(self, sql, params=()):
+        """Run a read query and return a list of dicts"""
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def query_df(self, sql, params=()):
+        """Run a read query and return a pandas DataFrame"""
+        import pandas as pd
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def report_rows(self, table, report_date):
+        """Rows ingested for one report date (ISO), or None if no file for it was loaded"""
+        row = self.conn.execute(
+            "SELECT COUNT(*) AS files, SUM(rows) AS rows FROM ingested_files "
+            "WHERE table_name = ? AND report_date = ?", (table, report_date)
+        ).fetchone()
+        return row['rows'] if row['files'] else None
+
+    def column_sum(self, table, report_date, column):
+        """SUM(column) over one report date (0 if the column has no values)"""
+        if column not in self.table_columns(table):
+            return 0
+        total = self.conn.execute(
+            f"SELECT SUM({quote(column)}) FROM {quote(table)} WHERE report_date = ?", (report_date,)
+        ).fetchone()[0]
+        return total or 0
+
+    def date_bounds(self, days, until=None):
+        """(since, until) ISO dates covering the last N days up to until (default yesterday)"""
+        end = until or (datetime.now().date() - timedelta(days=1))
+        start = end - timedelta(days=days - 1)
+        return start.isoformat(), end.isoformat()
+
+    def spend_by_adset(self, days=30, until=None):
+        """Spend, impressions, clicks and installs per ad set over the last N days"""
+        if not self.table_columns('fb_ad_overview'):
+            return []
+        since, until = self.date_bounds(days, until)
+        installs = self._optional_sum('fb_ad_overview', 'action_mobile_app_install')
+
+        return self.query(f"""
+            SELECT adset_id, MAX(adset_name) AS adset_name, MAX(campaign_name) AS campaign_name,
+                   SUM(spend) AS spend, SUM(impressions) AS impressions,
+                   SUM(clicks) AS clicks, {installs} AS installs,
+                   COUNT(DISTINCT report_date) AS days
+            FROM fb_ad_overview
+            WHERE report_date BETWEEN ? AND ?
+            GROUP BY adset_id
+            ORDER BY spend DESC
+        """, (since, until))
+
+    def daily_totals(self, days=30, until=None):
+        """Account-level spend, impressions, clicks and installs per day"""
+        if not self.table_columns('fb_ad_overview'):
+            return []
+        since, until = self.date_bounds(days, until)
+        installs = self._optional_sum('fb_ad_overview', 'action_mobile_app_install')
+
+        return self.query(f"""
+            SELECT report_date, SUM(spend) AS spend, SUM(impressions) AS impressions,
+                   SUM(clicks) AS clicks, {installs} AS installs
+            FROM fb_ad_overview
+            WHERE report_date BETWEEN ? AND ?
+            GROUP BY report_date
+            ORDER BY report_date
+        """, (since, until))
+
+    def _optional_sum(self, table, column):
+        """SUM(column) if the column has been seen, else NULL"""
+        if column in self.table_columns(table):
+            return f"SUM({quote(column)})"
+        return "NULL"
+
+
+def print_rows(rows):
+    if not rows:
+        print("No rows")
+        return
+    columns = list(rows[0].keys())
+    print(" | ".join(columns))
+    print("-" * 80)
+    for row in rows:
+        print(" | ".join(
+            f"{value:.2f}" if isinstance(value, float) else str(value)
+            for value in row.values()
+        ))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    command = sys.argv[1]
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    store = AnalyticsStore()
+    try:
+        if command == 'ingest':
+            store.ingest()
+        elif command == 'spend-by-adset':
+            store.ingest()
+            print_rows(store.spend_by_adset(days))
+        elif command == 'daily-totals':
+            store.ingest()
+            print_rows(store.daily_totals(days))
+        else:
+            print(f"❌ Unknown command: {command}")
+            print(__doc__)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,29 @@ Analyze Facebook Ads data using Claude AI
 """
 
 import os
-import csv
+import sys
 from datetime import datetime, timedelta
 import anthropic
 from dotenv import load_dotenv
+from prompt_encoder import PromptEncoder, FORMAT_NOTE, encode_csv_text
+from report_rollups import build_cubes, encode_cubes, ROLLUP_NOTE
+from llm_cache import ResponseCache, CachedAnalysisMixin
 
 load_dotenv()
 
-class ClaudeAnalyzer:
+MODEL = "claude-sonnet-4-20250514"
+
+# Passed to messages.create and part of the cache key
+REQUEST_SETTINGS = {"max_tokens": 4000}
+
+class ClaudeAnalyzer(CachedAnalysisMixin):
+    name = 'claude'
+    model = MODEL
+    request_settings = REQUEST_SETTINGS
+    api_name = 'Claude'
+    model_label = 'Claude'
+    analysis_title = "CLAUDE'S ANALYSIS"
+    
     def __init__(self):
         self.api_key = os.getenv('ANTHROPIC_API_KEY')
         if not self.api_key:
@@ -22,91 +37,119 @@ class ClaudeAnalyzer:
         # Load analysis prompt
         with open('analysis_prompt.txt', 'r') as f:
             self.analysis_prompt = f.read()
-    
-    def read_csv_to_text(self, filepath, max_rows=None):
-        """Convert CSV to formatted text for Claude"""
-        if not os.path.exists(filepath):
-            return None
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
         
-        if not rows:
+        self.cache = ResponseCache()
+    
+    def prepare_data_summary(self, date_str, raw=False):
+        """
+        Prepare data for analysis - rollup cubes of all four reports for the 7 days up to date_str
+        
+        raw=True sends that day's ad_overview rows instead (breakdowns as row counts only).
+        """
+        if raw:
+            return self.prepare_raw_summary(date_str)
+        
+        encoder = PromptEncoder()
+        cubes = encode_cubes(build_cubes(date_str, days=7), encoder)
+        if not cubes:
             return None
         
-        # Format as a readable table
-        text = f"\n{'='*80}\n{os.path.basename(filepath)}\n{'='*80}\n"
-        text += f"Total rows: {len(rows)}\n\n"
-        
-        # Limit rows if specified
-        rows_to_show = rows[:max_rows] if max_rows else rows
+        parts = ["# FACEBOOK ADS ROLLUPS - LAST 7 DAYS (overview + age, gender, placement)\n",
+                 FORMAT_NOTE, ROLLUP_NOTE, encoder.legend(), cubes]
+        self.token_estimates = encoder.token_report()
         
-        # Include rows for detailed analysis
-        for i, row in enumerate(rows_to_show, 1):
-            text += f"\n--- Row {i} ---\n"
-            for key, value in row.items():
-                if value:  # Only include non-empty values
-                    text += f"{key}: {value}\n"
-        
-        if max_rows and len(rows) > max_rows:
-            text += f"\n... and {len(rows) - max_rows} more rows\n"
-        
-        return text
+        return "".join(parts)
     
-    def prepare_data_summary(self, date_str):
-        """Prepare CSV data for analysis - main overview only, breakdowns as summaries"""
+    def prepare_raw_summary(self, date_str):
+        """Main overview only, breakdowns as summaries"""
         data_dir = 'data'
-        
-        data_summary = ""
+        encoder = PromptEncoder()
         
         # 1. Ad-level overview - FULL FILE (this is the main data)
+        overview = ""
         ad_file = os.path.join(data_dir, f'ad_overview_{date_str}.csv')
         if os.path.exists(ad_file):
-            data_summary += self.read_csv_to_text(ad_file) + "\n"
+            overview = encode_csv_text(ad_file, encoder) or ""
         
         # For breakdowns, note that they exist but don't include full data
         # (Claude can infer patterns from the main ad overview)
-        data_summary += "\n" + "="*80 + "\n"
-        data_summary += "BREAKDOWN DATA AVAILABLE (not shown to save space):\n"
-        data_summary += "="*80 + "\n"
+        parts = [FORMAT_NOTE, encoder.legend(), overview, "\n# BREAKDOWN DATA AVAILABLE (not shown to save space)\n"]
         
         age_file = os.path.join(data_dir, f'ad_by_age_{date_str}.csv')
         if os.path.exists(age_file):
-            data_summary += f"✓ Age breakdown: {self.count_rows(age_file)} rows\n"
+            parts.append(f"✓ Age breakdown: {self.count_rows(age_file)} rows\n")
         
         gender_file = os.path.join(data_dir, f'ad_by_gender_{date_str}.csv')
         if os.path.exists(gender_file):
-            data_summary += f"✓ Gender breakdown: {self.count_rows(gender_file)} rows\n"
+            parts.append(f"✓ Gender breakdown: {self.count_rows(gender_file)} rows\n")
         
         placement_file = os.path.join(data_dir, f'ad_by_placement_{date_str}.csv')
         if os.path.exists(placement_file):
-            data_summary += f"✓ Placement breakdown: {self.count_rows(placement_file)} rows\n"
+            parts.append(f"✓ Placement breakdown: {self.count_rows(placement_file)} rows\n")
         
-        data_summary += "\nNote: Focus analysis on the ad_overview data above.\n"
+        parts.append("\nNote: Focus analysis on the ad_overview data above.\n")
+        self.token_estimates = encoder.token_report()
         
-        return data_summary
+        return "".join(parts)
     
     def count_rows(self, filepath):
         """Count rows in a CSV file"""
         with open(filepath, 'r') as f:
             return sum(1 for _ in f) - 1  # Subtract header row
     
-    def analyze(self, date_str):
-        """Send data to Claude for analysis"""
+    def request_analysis(self, message_content):
+        """One messages.create call, returns the analysis text"""
+        # Call Claude API
+        message = self.client.messages.create(
+            model=MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": message_content
+                }
+            ],
+            **REQUEST_SETTINGS
+        )
+        
+        return message.content[0].text
+    
+    def stream_analysis(self, message_content):
+        """Yield the analysis text as it arrives (messages.stream)"""
+        with self.client.messages.stream(
+            model=MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": message_content
+                }
+            ],
+            **REQUEST_SETTINGS
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+    
+    def analyze(self, date_str, raw=False, force=False, stream=False):
+        """
+        Send data to Claude for analysis
+        
+        force and stream as in CachedAnalysisMixin.deliver_analysis (llm_cache.py)
+        """
         print("=" * 80)
         print("🤖 Starting Claude AI Analysis")
         print("=" * 80)
         
         # Prepare data
         print("\n📊 Loading CSV data...")
-        data_summary = self.prepare_data_summary(date_str)
+        data_summary = self.prepare_data_summary(date_str, raw)
         
         if not data_summary:
             print("❌ No data found for analysis")
             return None
         
         print(f"✅ Data loaded ({len(data_summary)} characters)")
+        print("📏 Estimated prompt tokens by section:")
+        for line in self.token_estimates:
+            print(line)
         
         # Construct message for Claude
         message_content = f"""{self.analysis_prompt}
@@ -117,61 +160,28 @@ DATA FOR ANALYSIS:
 Please provide a comprehensive analysis following the structure outlined above.
 Focus on actionable insights and specific recommendations."""
         
-        print("\n🔄 Sending to Claude...")
-        
-        try:
-            # Call Claude API
-            message = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4000,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": message_content
-                    }
-                ]
-            )
-            
-            analysis = message.content[0].text
-            
-            print("✅ Analysis received!")
-            print("\n" + "=" * 80)
-            print("📊 CLAUDE'S ANALYSIS")
-            print("=" * 80)
-            print(analysis)
-            print("=" * 80)
-            
-            # Save analysis to file
-            output_dir = 'analyses'
-            os.makedirs(output_dir, exist_ok=True)
-            
-            output_file = os.path.join(output_dir, f'analysis_{date_str}.txt')
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(f"Facebook Ads Analysis - {date_str}\n")
-                f.write("=" * 80 + "\n\n")
-                f.write(analysis)
-            
-            print(f"\n💾 Analysis saved to: {output_file}")
-            
-            return analysis
-            
-        except Exception as e:
-            print(f"❌ Error calling Claude API: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
+        output_dir = 'analyses'
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, f'analysis_{date_str}.txt')
+        header = f"Facebook Ads Analysis - {date_str}\n" + "=" * 80 + "\n\n"
+        
+        return self.deliver_analysis(message_content, output_file, header, force, stream, date=date_str)
     
-    def analyze_yesterday(self):
+    def analyze_yesterday(self, raw=False, force=False, stream=False):
         """Analyze yesterday's data"""
         yesterday = datetime.now().date() - timedelta(days=1)
         date_str = yesterday.strftime('%Y%m%d')
         
-        return self.analyze(date_str)
+        return self.analyze(date_str, raw, force, stream)
 
 def main():
     try:
         analyzer = ClaudeAnalyzer()
-        analyzer.analyze_yesterday()
+        analyzer.analyze_yesterday(
+            raw='--raw' in sys.argv,
+            force='--force' in sys.argv,
+            stream='--stream' in sys.argv
+        )
         
     except Exception as e:
         print(f"❌ Error: {str(e)}")
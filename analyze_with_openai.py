@@ -4,14 +4,32 @@ Analyze Facebook Ads data using OpenAI GPT-4 with reasoning
 """
 
 import os
-import csv
+import sys
 from datetime import datetime, timedelta
 from openai import OpenAI
 from dotenv import load_dotenv
+from prompt_encoder import PromptEncoder, FORMAT_NOTE, encode_csv_text
+from report_rollups import build_cubes, encode_cubes, ROLLUP_NOTE
+from llm_cache import ResponseCache, CachedAnalysisMixin
 
 load_dotenv()
 
-class OpenAIAnalyzer:
+MODEL = "gpt-5.1"
+
+# Passed to responses.create and part of the cache key
+REQUEST_SETTINGS = {
+    "reasoning": {"effort": "medium"},  # Use medium reasoning effort for thorough analysis
+    "text": {"verbosity": "medium"},
+}
+
+class OpenAIAnalyzer(CachedAnalysisMixin):
+    name = 'openai'
+    model = MODEL
+    request_settings = REQUEST_SETTINGS
+    api_name = 'OpenAI'
+    model_label = 'OpenAI GPT-5.1 (with reasoning)'
+    analysis_title = "OPENAI'S ANALYSIS"
+    
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
         if not self.api_key:
@@ -22,50 +40,45 @@ class OpenAIAnalyzer:
         # Load analysis prompt
         with open('analysis_prompt.txt', 'r') as f:
             self.analysis_prompt = f.read()
-    
-    def read_csv_to_text(self, filepath):
-        """Convert CSV to formatted text for analysis"""
-        if not os.path.exists(filepath):
-            return None
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-        
-        if not rows:
-            return None
-        
-        # Format as a readable table
-        text = f"\n{'='*80}\n{os.path.basename(filepath)}\n{'='*80}\n"
-        text += f"Total rows: {len(rows)}\n\n"
         
-        # Include all rows for detailed analysis
-        for i, row in enumerate(rows, 1):
-            text += f"\n--- Row {i} ---\n"
-            for key, value in row.items():
-                if value:  # Only include non-empty values
-                    text += f"{key}: {value}\n"
-        
-        return text
+        self.cache = ResponseCache()
     
     def count_rows(self, filepath):
         """Count rows in a CSV file"""
         with open(filepath, 'r') as f:
             return sum(1 for _ in f) - 1  # Subtract header row
     
-    def prepare_data_summary(self, date_str):
-        """Prepare CSV data for analysis - main overview for last 7 days"""
-        data_dir = 'data'
+    def prepare_data_summary(self, date_str, raw=False):
+        """
+        Prepare data for analysis - rollup cubes of all four reports for the last 7 days
+        
+        raw=True sends the ad_overview rows of each day instead (no breakdowns).
+        """
+        if raw:
+            return self.prepare_raw_summary(date_str)
+        
+        encoder = PromptEncoder()
+        cubes = encode_cubes(build_cubes(date_str, days=7), encoder)
+        if not cubes:
+            return None
         
-        data_summary = ""
-        data_summary += "="*80 + "\n"
-        data_summary += "FACEBOOK ADS DATA - LAST 7 DAYS\n"
-        data_summary += "="*80 + "\n\n"
+        # The legend covers every name coded in the cubes
+        parts = ["# FACEBOOK ADS ROLLUPS - LAST 7 DAYS (overview + age, gender, placement)\n",
+                 FORMAT_NOTE, ROLLUP_NOTE, encoder.legend(), cubes]
+        self.token_estimates = encoder.token_report()
+        
+        return "".join(parts)
+    
+    def prepare_raw_summary(self, date_str):
+        """Raw ad_overview rows for each of the last 7 days"""
+        data_dir = 'data'
+        encoder = PromptEncoder()
         
         # Get the date for yesterday
         yesterday = datetime.strptime(date_str, '%Y%m%d').date()
         
         # Load data for each of the past 7 days
+        days = []
         for days_ago in range(7):
             target_date = yesterday - timedelta(days=days_ago)
             target_date_str = target_date.strftime('%Y%m%d')
@@ -73,37 +86,73 @@ class OpenAIAnalyzer:
             ad_file = os.path.join(data_dir, f'ad_overview_{target_date_str}.csv')
             
             if os.path.exists(ad_file):
-                data_summary += f"\n{'='*80}\n"
-                data_summary += f"DAY {days_ago+1}: {target_date.strftime('%Y-%m-%d')} ({days_ago} days ago)\n"
-                data_summary += f"{'='*80}\n"
-                data_summary += self.read_csv_to_text(ad_file) + "\n"
+                days.append(f"\n# DAY {days_ago+1}: {target_date.strftime('%Y-%m-%d')} ({days_ago} days ago)")
+                days.append(encode_csv_text(ad_file, encoder) or "\n(no rows)\n")
             else:
-                data_summary += f"\n⚠️ No data for {target_date.strftime('%Y-%m-%d')}\n"
+                days.append(f"\n⚠️ No data for {target_date.strftime('%Y-%m-%d')}\n")
         
         # Note about breakdown data (available but not sent to save tokens)
-        data_summary += "\n" + "="*80 + "\n"
-        data_summary += "BREAKDOWN DATA AVAILABLE (not shown):\n"
-        data_summary += "="*80 + "\n"
-        data_summary += "Age, gender, and placement breakdowns exist for each day above.\n"
-        data_summary += "Focus analysis on the ad_overview data shown.\n"
+        footer = (
+            "\n# BREAKDOWN DATA AVAILABLE (not shown)\n"
+            "Age, gender, and placement breakdowns exist for each day above.\n"
+            "Focus analysis on the ad_overview data shown.\n"
+        )
+        
+        # The legend covers every name coded in the day sections
+        parts = ["# FACEBOOK ADS DATA - LAST 7 DAYS\n", FORMAT_NOTE, encoder.legend()] + days + [footer]
+        self.token_estimates = encoder.token_report()
         
-        return data_summary
+        return "".join(parts)
+    
+    def request_analysis(self, message_content):
+        """One responses.create call, returns the analysis text"""
+        # Call OpenAI API with GPT-5.1 using new responses.create format
+        result = self.client.responses.create(
+            model=MODEL,
+            input=message_content,
+            **REQUEST_SETTINGS
+        )
+        
+        return result.output_text
+    
+    def stream_analysis(self, message_content):
+        """Yield the analysis text as it arrives (responses.create with stream=True)"""
+        events = self.client.responses.create(
+            model=MODEL,
+            input=message_content,
+            stream=True,
+            **REQUEST_SETTINGS
+        )
+        
+        for event in events:
+            if event.type == 'response.output_text.delta':
+                yield event.delta
+            elif event.type in ('response.failed', 'error'):
+                error = getattr(event, 'message', None) or getattr(event.response, 'error', None)
+                raise Exception(f"{event.type}: {error}")
     
-    def analyze(self, date_str):
-        """Send data to OpenAI for analysis"""
+    def analyze(self, date_str, raw=False, force=False, stream=False):
+        """
+        Send data to OpenAI for analysis
+        
+        force and stream as in CachedAnalysisMixin.deliver_analysis (llm_cache.py)
+        """
         print("=" * 80)
         print("🤖 Starting OpenAI GPT Analysis")
         print("=" * 80)
         
         # Prepare data
         print("\n📊 Loading CSV data...")
-        data_summary = self.prepare_data_summary(date_str)
+        data_summary = self.prepare_data_summary(date_str, raw)
         
         if not data_summary:
             print("❌ No data found for analysis")
             return None
         
         print(f"✅ Data loaded ({len(data_summary)} characters)")
+        print("📏 Estimated prompt tokens by section:")
+        for line in self.token_estimates:
+            print(line)
         
         # Construct message
         message_content = f"""{self.analysis_prompt}
@@ -113,57 +162,28 @@ DATA FOR ANALYSIS:
 
 Please provide your analysis in a conversational, insights-focused format as described above."""
         
-        print("\n🔄 Sending to OpenAI GPT-5.1 (with reasoning)...")
+        output_dir = 'analyses'
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, f'analysis_openai_{date_str}.txt')
+        header = f"Facebook Ads Analysis (OpenAI GPT) - {date_str}\n" + "=" * 80 + "\n\n"
         
-        try:
-            # Call OpenAI API with GPT-5.1 using new responses.create format
-            result = self.client.responses.create(
-                model="gpt-5.1",
-                input=message_content,
-                reasoning={"effort": "medium"},  # Use medium reasoning effort for thorough analysis
-                text={"verbosity": "medium"}
-            )
-            
-            analysis = result.output_text
-            
-            print("✅ Analysis received!")
-            print("\n" + "=" * 80)
-            print("📊 OPENAI'S ANALYSIS")
-            print("=" * 80)
-            print(analysis)
-            print("=" * 80)
-            
-            # Save analysis to file
-            output_dir = 'analyses'
-            os.makedirs(output_dir, exist_ok=True)
-            
-            output_file = os.path.join(output_dir, f'analysis_openai_{date_str}.txt')
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(f"Facebook Ads Analysis (OpenAI GPT) - {date_str}\n")
-                f.write("=" * 80 + "\n\n")
-                f.write(analysis)
-            
-            print(f"\n💾 Analysis saved to: {output_file}")
-            
-            return analysis
-            
-        except Exception as e:
-            print(f"❌ Error calling OpenAI API: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
+        return self.deliver_analysis(message_content, output_file, header, force, stream, date=date_str)
     
-    def analyze_last_7_days(self):
+    def analyze_last_7_days(self, raw=False, force=False, stream=False):
         """Analyze last 7 days of data"""
         yesterday = datetime.now().date() - timedelta(days=1)
         date_str = yesterday.strftime('%Y%m%d')
         
-        return self.analyze(date_str)
+        return self.analyze(date_str, raw, force, stream)
 
 def main():
     try:
         analyzer = OpenAIAnalyzer()
-        analyzer.analyze_last_7_days()
+        analyzer.analyze_last_7_days(
+            raw='--raw' in sys.argv,
+            force='--force' in sys.argv,
+            stream='--stream' in sys.argv
+        )
         
     except Exception as e:
         print(f"❌ Error: {str(e)}")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Data pipeline benchmark - replays the data/ CSVs through the daily job's stages
+
+Stages (timed per scale):
+    parse      csv.DictReader over every report CSV
+    flatten    FacebookDataDownloader.flatten_actions on API-shaped rows
+               (action_*/cpa_*/video_* columns folded back into nested lists)
+    write      FacebookDataDownloader.save_to_csv
+    summarize  prompt_encoder.encode_csv_text and the analyzers' prepare_data_summary
+    compare    FBAppsFlyerComparison.compare_daily (AppsFlyer files synthesized
+               from the FB installs when data/ has none)
+
+Scales replicate every file's rows N times with distinct ad ids, in a
+temporary workspace - data/ itself is never modified. Each stage reports
+wall time, rows and MB per second and peak RSS; results are saved as JSON
+for comparison across commits.
+
+Usage:
+    python benchmarks/bench_pipeline.py                       # scales 1 10 100
+    python benchmarks/bench_pipeline.py --scales 1 10 --days 7
+    python benchmarks/bench_pipeline.py --output benchmarks/results/pipeline.json
+"""
+
+import os
+import csv
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from download_fb_data import FacebookDataDownloader
+from analyze_with_openai import OpenAIAnalyzer
+from prompt_encoder import encode_csv_text
+from analyze_with_claude import ClaudeAnalyzer
+from compare_fb_af import FBAppsFlyerComparison
+from report_schema import report_file_parts
+
+# Columns flatten_actions produces from nested lists, by prefix
+NESTED_PREFIXES = [
+    ('video_30_sec_watched_actions_', 'video_30_sec_watched_actions'),
+    ('video_p25_watched_actions_', 'video_p25_watched_actions'),
+    ('video_p50_watched_actions_', 'video_p50_watched_actions'),
+    ('video_p75_watched_actions_', 'video_p75_watched_actions'),
+    ('video_p100_watched_actions_', 'video_p100_watched_actions'),
+    ('video_avg_time_watched_actions_', 'video_avg_time_watched_actions'),
+    ('action_', 'actions'),
+    ('cpa_', 'cost_per_action_type'),
+]
+
+
+class PeakRSS:
+    """Sample the process RSS in the background and keep the peak (Linux /proc)"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def read(self):
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                return int(f.read().split()[1]) * self.page_size
+        except (OSError, ValueError, IndexError):
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def __enter__(self):
+        self.peak = self.read()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def sample(self):
+        while not self.stop.wait(self.interval):
+            self.peak = max(self.peak, self.read())
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        self.peak = max(self.peak, self.read())
+
+
+def unflatten(row):
+    """Fold flattened action/cpa/video columns back into Graph API style lists"""
+    nested = {}
+    for key, value in row.items():
+        if value == '':
+            continue
+        for prefix, field in NESTED_PREFIXES:
+            if key.startswith(prefix):
+                nested.setdefault(field, []).append({'action_type': key[len(prefix):], 'value': value})
+                break
+        else:
+            nested[key] = value
+    return nested
+
+
+def build_workspace(workspace, scale, days):
+    """Copy (and scale up) the report CSVs of the last `days` dates into workspace/data"""
+    data_dir = os.path.join(workspace, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    paths = sorted(glob.glob(os.path.join(REPO_DIR, 'data', '*.csv')))
+    dates = sorted({report_file_parts(p)[1] for p in paths if report_file_parts(p)})
+    dates = dates[-days:] if days else dates
+
+    copied = []
+    for path in paths:
+        parts = report_file_parts(path)
+        if not parts or parts[1] not in dates:
+            continue
+        target = os.path.join(data_dir, os.path.basename(path))
+        if scale == 1:
+            shutil.copyfile(path, target)
+        else:
+            with open(path, 'r', encoding='utf-8') as src, open(target, 'w', newline='', encoding='utf-8') as dst:
+                reader = csv.DictReader(src)
+                rows = list(reader)
+                writer = csv.DictWriter(dst, fieldnames=reader.fieldnames)
+                writer.writeheader()
+                for copy in range(scale):
+                    for row in rows:
+                        if copy and row.get('ad_id'):
+                            row = {**row, 'ad_id': f"{row['ad_id']}{copy:03d}"}
+                        writer.writerow(row)
+        copied.append(target)
+
+    # compare_daily needs AppsFlyer files; derive them from FB installs if missing
+    for date_str in dates:
+        fb_file = os.path.join(data_dir, f'ad_overview_{date_str}.csv')
+        af_file = os.path.join(data_dir, f'appsflyer_fb_{date_str}.csv')
+        if os.path.exists(fb_file) and not os.path.exists(af_file):
+            with open(fb_file, 'r', encoding='utf-8') as src, open(af_file, 'w', newline='', encoding='utf-8') as dst:
+                writer = csv.writer(dst)
+                writer.writerow(['Campaign', 'Installs', 'StartTrial'])
+                for row in csv.DictReader(src):
+                    installs = float(row.get('action_mobile_app_install') or 0)
+                    writer.writerow([row.get('campaign_name'), round(installs * 0.9), round(installs * 0.2)])
+
+    return data_dir, dates, copied
+
+
+def timed(name, rows, nbytes, task):
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            task()
+        wall = time.perf_counter() - started
+    return {
+        'stage': name,
+        'wall_seconds': round(wall, 4),
+        'rows': rows,
+        'rows_per_second': round(rows / wall, 1) if wall else None,
+        'mb_per_second': round(nbytes / 1024 / 1024 / wall, 2) if wall else None,
+        'peak_rss_mb': round(rss.peak / 1024 / 1024, 1),
+    }
+
+
+def run_scale(scale, args):
+    workspace = tempfile.mkdtemp(prefix=f'bench_pipeline_{scale}x_')
+    cwd = os.getcwd()
+    try:
+        data_dir, dates, files = build_workspace(workspace, scale, args.days)
+        os.chdir(workspace)  # the analyzers and comparison use relative data/ paths
+
+        nbytes = sum(os.path.getsize(path) for path in files)
+        parsed = {}
+
+        def parse():
+            for path in files:
+                with open(path, 'r', encoding='utf-8') as f:
+                    parsed[path] = list(csv.DictReader(f))
+
+        stages = [timed('parse', 0, nbytes, parse)]
+        total_rows = sum(len(rows) for rows in parsed.values())
+        stages[0]['rows'] = total_rows
+        stages[0]['rows_per_second'] = round(total_rows / stages[0]['wall_seconds'], 1)
+
+        # Bypass __init__: no API clients or tokens are needed for these methods
+        downloader = FacebookDataDownloader.__new__(FacebookDataDownloader)
+        downloader.data_dir = os.path.join(workspace, 'out')
+        api_rows = {path: [unflatten(row) for row in rows] for path, rows in parsed.items()}
+        flattened = {}
+
+        def flatten():
+            for path, rows in api_rows.items():
+                flattened[path] = downloader.flatten_actions(rows)
+
+        def write():
+            for path, rows in flattened.items():
+                downloader.save_to_csv(rows, os.path.basename(path))
+
+        stages.append(timed('flatten', total_rows, nbytes, flatten))
+        stages.append(timed('write', total_rows, nbytes, write))
+
+        openai_analyzer = OpenAIAnalyzer.__new__(OpenAIAnalyzer)
+        claude_analyzer = ClaudeAnalyzer.__new__(ClaudeAnalyzer)
+        overview_files = [path for path in files if os.path.basename(path).startswith('ad_overview_')]
+        overview_rows = sum(len(parsed[path]) for path in overview_files)
+        overview_bytes = sum(os.path.getsize(path) for path in overview_files)
+        prompt_sizes = {}
+
+        def summarize():
+            for path in overview_files:
+                encode_csv_text(path)
+            prompt_sizes['openai_7_day_chars'] = len(openai_analyzer.prepare_data_summary(dates[-1]))
+            prompt_sizes['claude_1_day_chars'] = len(claude_analyzer.prepare_data_summary(dates[-1]))
+
+        stages.append(timed('summarize', overview_rows, overview_bytes, summarize))
+
+        comparator = FBAppsFlyerComparison()
+
+        def compare():
+            for date_str in dates:
+                comparator.compare_daily(date_str)
+
+        stages.append(timed('compare', overview_rows, overview_bytes, compare))
+
+        return {
+            'scale': scale,
+            'files': len(files),
+            'days': len(dates),
+            'rows': total_rows,
+            'mb': round(nbytes / 1024 / 1024, 2),
+            **prompt_sizes,
+            'stages': stages,
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def print_report(result):
+    print(f"\n📦 {result['scale']}x: {result['files']} files, {result['rows']} rows, {result['mb']} MB "
+          f"(7-day OpenAI prompt {result.get('openai_7_day_chars', 0):,} chars)")
+    print(f"  {'stage':<10} {'wall s':>9} {'rows/s':>12} {'MB/s':>8} {'peak RSS MB':>12}")
+    for stage in result['stages']:
+        print(f"  {stage['stage']:<10} {stage['wall_seconds']:>9.3f} {stage['rows_per_second'] or 0:>12,.0f} "
+              f"{stage['mb_per_second'] or 0:>8.2f} {stage['peak_rss_mb']:>12.1f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the report pipeline over the data/ CSVs")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help="row multipliers to run (default: 1 10 100)")
+    parser.add_argument('--days', type=int, default=None, help="only use the most recent N dates")
+    parser.add_argument('--output', help="JSON results path (default: benchmarks/results/pipeline_<time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not glob.glob(os.path.join(REPO_DIR, 'data', '*.csv')):
+        print("❌ No CSVs in data/ to benchmark")
+        sys.exit(1)
+
+    results = []
+    for scale in args.scales:
+        print(f"⏱️  Running {scale}x...")
+        result = run_scale(scale, args)
+        print_report(result)
+        results.append(result)
+
+    output = args.output or os.path.join(
+        REPO_DIR, 'benchmarks', 'results', f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'created': datetime.now().isoformat(), 'results': results}, f, indent=2)
+    print(f"\n💾 Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Scheduler benchmark - nightly and daytime runs against the fake Graph API
+
+Runs BudgetScheduler (real SDK, real state store, dry_run off) against
+benchmarks/fake_graph.py for each account size and update strategy and
+reports wall time, HTTP requests, Graph calls and peak Python memory.
+Nothing touches the real API or the real budget_state.json.
+
+Usage:
+    python benchmarks/bench_scheduler.py                          # 10, 100, 1000 objects
+    python benchmarks/bench_scheduler.py --sizes 10 100 1000 10000 --latency 0.02
+    python benchmarks/bench_scheduler.py --strategies batch concurrent --rate-limit 200
+    python benchmarks/bench_scheduler.py --save benchmarks/results/baseline.json
+    python benchmarks/bench_scheduler.py --compare benchmarks/results/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from facebook_business.api import FacebookAdsApi
+from facebook_business.exceptions import FacebookRequestError
+from budget_scheduler_v2 import BudgetScheduler
+from fake_graph import FakeAccount, FakeGraphAdapter
+
+ACCOUNT = {'id': 'act_bench', 'name': 'Benchmark'}
+
+STRATEGIES = {
+    'sequential': {'batch_updates': False, 'concurrent_updates': {'enabled': False}},
+    'batch': {'batch_updates': True, 'concurrent_updates': {'enabled': False}},
+    'concurrent': {'batch_updates': False, 'concurrent_updates': {'enabled': True, 'max_workers': 8}},
+}
+
+# Metrics compared against a baseline (higher is worse)
+GUARDED_METRICS = ('wall_seconds', 'http_requests', 'graph_calls')
+
+
+def write_config(directory, strategy, discovery_mode):
+    config = {
+        'timezone': 'America/Los_Angeles',
+        'accounts': [ACCOUNT],
+        'budgets': {'nightly_amount': 5000, 'restore_original': True},
+        'schedule': {'nightly_time': '00:00', 'daytime_time': '07:00'},
+        'excluded_adsets': [],
+        'excluded_campaigns': [],
+        'discovery_mode': discovery_mode,
+        'account_snapshot_path': os.path.join(directory, 'account_snapshot.json'),
+        'state_backend': 'journal',
+        'dry_run': False,
+        **STRATEGIES[strategy],
+    }
+    path = os.path.join(directory, 'config.json')
+    with open(path, 'w') as f:
+        json.dump(config, f)
+    return path
+
+
+def describe_error(e):
+    if isinstance(e, FacebookRequestError):
+        return f"FacebookRequestError {e.api_error_code()}: {e.api_error_message()}"
+    return f"{type(e).__name__}: {str(e)}"
+
+
+def measure(adapter, task):
+    """
+    Run task() and return its wall time, request counts and peak traced memory
+
+    An exception (e.g. a rate-limit error while fetching the account) is
+    recorded in 'error' instead of stopping the benchmark.
+    """
+    before = dict(adapter.counts)
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    updates = []
+    error = None
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            updates = task()
+    except Exception as e:
+        error = describe_error(e)
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+
+    delta = {key: adapter.counts[key] - before.get(key, 0) for key in adapter.counts}
+    return {
+        'wall_seconds': round(wall, 4),
+        'http_requests': delta.get('http_requests', 0),
+        'graph_calls': delta.get('calls', 0),
+        'throttled': delta.get('throttled', 0),
+        'updates': len(updates),
+        'failed': sum(1 for update in updates if not update.get('success')),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+        'error': error,
+    }
+
+
+def run_case(size, strategy, args):
+    """One nightly + daytime cycle on a fresh fake account"""
+    account = FakeAccount.generate(size, seed=args.seed, account_id=ACCOUNT['id'])
+
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = write_config(directory, strategy, args.discovery_mode)
+        state_path = os.path.join(directory, 'budget_state.json')
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            scheduler = BudgetScheduler(config_path, state_path, account=ACCOUNT)
+        adapter = FakeGraphAdapter(
+            account, latency=args.latency, rate_limit=args.rate_limit, window_seconds=args.window
+        ).install(FacebookAdsApi.get_default_api())
+
+        results = []
+        for mode, apply in (('nightly', scheduler.apply_nightly_budgets),
+                            ('daytime', scheduler.apply_daytime_budgets)):
+            def task():
+                updates = apply()
+                scheduler.store.set_mode(mode, datetime.now().isoformat())
+                scheduler.save_state()
+                return updates
+
+            result = measure(adapter, task)
+            results.append({'size': size, 'objects': account.budget_objects,
+                            'strategy': strategy, 'mode': mode, **result})
+        return results
+
+
+def case_key(result):
+    return f"{result['size']}/{result['strategy']}/{result['mode']}"
+
+
+def compare(results, baseline_path, tolerance):
+    """Print regressions against a saved run; returns the number found"""
+    with open(baseline_path, 'r') as f:
+        baseline = {case_key(result): result for result in json.load(f)['results']}
+
+    regressions = 0
+    print(f"\n📏 Compared with {baseline_path} (tolerance {tolerance:.0%})")
+    for result in results:
+        base = baseline.get(case_key(result))
+        if not base:
+            continue
+        if result.get('error'):
+            if not base.get('error'):
+                regressions += 1
+                print(f"  ❌ {case_key(result)} failed: {result['error']}")
+            continue
+        for metric in GUARDED_METRICS:
+            # Ignore sub-10ms timing noise
+            if metric == 'wall_seconds' and result[metric] < 0.01:
+                continue
+            if base[metric] and result[metric] > base[metric] * (1 + tolerance):
+                regressions += 1
+                print(f"  ❌ {case_key(result)} {metric}: {base[metric]} → {result[metric]}")
+
+    if not regressions:
+        print("  ✅ No regressions")
+    return regressions
+
+
+def print_table(results):
+    header = f"{'objects':>8} {'strategy':<11} {'mode':<8} {'wall s':>8} {'http':>6} {'calls':>6} " \
+             f"{'429s':>5} {'updates':>8} {'failed':>7} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['objects']:>8} {r['strategy']:<11} {r['mode']:<8} {r['wall_seconds']:>8.3f} "
+              f"{r['http_requests']:>6} {r['graph_calls']:>6} {r['throttled']:>5} {r['updates']:>8} "
+              f"{r['failed']:>7} {r['peak_mb']:>8.2f}")
+        if r.get('error'):
+            print(f"{'':>8} ❌ {r['error']}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the budget scheduler against a fake Graph API")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help="budget objects per account (default: 10 100 1000)")
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--discovery-mode', default='account', choices=['account', 'delta', 'per_campaign'])
+    parser.add_argument('--latency', type=float, default=0.005, help="seconds per HTTP request (default: 0.005)")
+    parser.add_argument('--rate-limit', type=int, default=None,
+                        help="Graph calls allowed per window before code 80004 errors (default: unlimited)")
+    parser.add_argument('--window', type=float, default=10.0, help="rate-limit window in seconds (default: 10)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help="write results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON to check for regressions (exit 1 if any)")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown before a metric counts as a regression (default: 0.25)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault('FACEBOOK_ACCESS_TOKEN', 'fake-benchmark-token')
+    tracemalloc.start()
+
+    results = []
+    for size in args.sizes:
+        for strategy in args.strategies:
+            print(f"⏱️  {size} objects, {strategy}...")
+            results.extend(run_case(size, strategy, args))
+
+    print()
+    print_table(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({'created': datetime.now().isoformat(), 'args': vars(args), 'results': results}, f, indent=2)
+        print(f"\n💾 Saved {args.save}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Fake Graph API - an in-process stand-in for graph.facebook.com
+
+FakeGraphAdapter is a requests transport adapter. Mounted on the session of
+a FacebookAdsApi it answers the calls the budget scheduler makes, so the real
+SDK code paths (cursors, batches, FacebookRequestError) run unchanged:
+
+    GET  act_<id>/adsets, act_<id>/campaigns, <campaign id>/adsets   (paginated)
+    POST <id>                 daily_budget updates
+    POST /  batch=[...]       batch requests (up to 50 calls)
+
+It simulates per-request latency, x-ad-account-usage / x-business-use-case-usage
+headers and rate-limit errors (code 80004) once more calls than rate_limit
+land inside window_seconds, and counts every request it serves.
+"""
+
+import json
+import math
+import time
+import random
+import base64
+import threading
+from collections import deque, Counter
+from urllib.parse import urlparse, parse_qs
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+GRAPH_URL = 'https://graph.facebook.com'
+
+
+class FakeAccount:
+    """Campaigns and ad sets of one simulated ad account"""
+
+    def __init__(self, account_id='act_bench'):
+        self.account_id = account_id
+        self.campaigns = {}
+        self.adsets = {}
+
+    @classmethod
+    def generate(cls, n_objects, adsets_per_campaign=3, cbo_share=0.3, seed=1, account_id='act_bench'):
+        """
+        Build an account with about n_objects budget-carrying objects
+
+        A cbo_share of campaigns carry the budget themselves (one object each,
+        their ad sets have none); the rest are ABO campaigns whose ad sets
+        each carry a budget.
+        """
+        rng = random.Random(seed)
+        account = cls(account_id)
+        updated_time = '2025-01-01T00:00:00+0000'
+        objects = 0
+        next_id = 120200000000000
+
+        while objects < n_objects:
+            next_id += 1
+            campaign_id = str(next_id)
+            is_cbo = rng.random() < cbo_share
+            account.campaigns[campaign_id] = {
+                'id': campaign_id,
+                'name': f"Campaign {len(account.campaigns) + 1}",
+                'status': 'ACTIVE',
+                'effective_status': 'ACTIVE',
+                'daily_budget': str(rng.randrange(50, 500) * 100) if is_cbo else None,
+                'updated_time': updated_time,
+            }
+            objects += 1 if is_cbo else 0
+
+            for _ in range(adsets_per_campaign):
+                if not is_cbo and objects >= n_objects:
+                    break
+                next_id += 1
+                adset_id = str(next_id)
+                account.adsets[adset_id] = {
+                    'id': adset_id,
+                    'name': f"Ad set {len(account.adsets) + 1}",
+                    'status': 'ACTIVE',
+                    'effective_status': 'ACTIVE',
+                    'campaign_id': campaign_id,
+                    'daily_budget': None if is_cbo else str(rng.randrange(20, 300) * 100),
+                    'updated_time': updated_time,
+                }
+                objects += 0 if is_cbo else 1
+
+        return account
+
+    @property
+    def budget_objects(self):
+        return sum(1 for c in self.campaigns.values() if c['daily_budget']) + \
+            sum(1 for a in self.adsets.values() if a['daily_budget'])
+
+    def adset_node(self, adset, fields):
+        node = {key: value for key, value in adset.items() if key in fields and value is not None}
+        if 'campaign' in fields:
+            campaign = self.campaigns[adset['campaign_id']]
+            node['campaign'] = {
+                key: campaign[key] for key in ('id', 'name', 'daily_budget') if campaign[key] is not None
+            }
+        return node
+
+    def campaign_node(self, campaign, fields):
+        return {key: value for key, value in campaign.items() if key in fields and value is not None}
+
+
+class FakeGraphAdapter(BaseAdapter):
+    def __init__(self, account, latency=0.0, rate_limit=None, window_seconds=10.0, page_limit=500):
+        super().__init__()
+        self.account = account
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window_seconds = window_seconds
+        self.page_limit = page_limit
+        self.counts = Counter()
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def install(self, api):
+        """Route a FacebookAdsApi's HTTP traffic to this adapter"""
+        api._session.requests.mount(GRAPH_URL, self)
+        return self
+
+    def close(self):
+        pass
+
+    # --- rate limiting -------------------------------------------------------
+
+    def register_calls(self, n):
+        """Count n calls against the window; returns (allowed, usage_pct, reset_seconds)"""
+        with self.lock:
+            now = time.monotonic()
+            while self.calls and now - self.calls[0] > self.window_seconds:
+                self.calls.popleft()
+            reset = self.window_seconds - (now - self.calls[0]) if self.calls else 0.0
+
+            if self.rate_limit is None:
+                return True, 0.0, 0.0
+            if len(self.calls) + n > self.rate_limit:
+                return False, 100.0, max(reset, 0.1)
+            self.calls.extend([now] * n)
+            return True, 100.0 * len(self.calls) / self.rate_limit, reset
+
+    def usage_headers(self, usage_pct, reset_seconds):
+        account_id = self.account.account_id[len('act_'):]
+        return {
+            'x-ad-account-usage': json.dumps({
+                'acc_id_util_pct': round(usage_pct, 1),
+                # Whole seconds like the real header; 0 only when nothing is in the window
+                'reset_time_duration': math.ceil(reset_seconds),
+            }),
+            'x-business-use-case-usage': json.dumps({
+                account_id: [{'type': 'ads_management', 'call_count': int(usage_pct),
+                              'total_cputime': 0, 'total_time': 0, 'estimated_time_to_regain_access': 0}]
+            }),
+        }
+
+    def throttled_body(self):
+        return {'error': {
+            'message': 'There have been too many calls from this ad-account. Please wait a bit and try again.',
+            'type': 'OAuthException', 'code': 80004, 'error_subcode': 2446079, 'fbtrace_id': 'fake'
+        }}
+
+    # --- transport -------------------------------------------------------------
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+
+        url = urlparse(request.url)
+        path = [part for part in url.path.split('/') if part][1:]  # drop the API version
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = {}
+        if request.body:
+            raw = request.body.decode() if isinstance(request.body, bytes) else request.body
+            body = {key: values[0] for key, values in parse_qs(raw).items()}
+
+        if request.method == 'POST' and not path and 'batch' in body:
+            status, payload, headers = self.handle_batch(json.loads(body['batch']))
+        else:
+            status, payload, headers = self.handle_call(request.method, path, {**query, **body}, count=True)
+
+        return self.build_response(request, status, payload, headers)
+
+    def handle_batch(self, calls):
+        with self.lock:
+            self.counts['http_requests'] += 1
+            self.counts['batch_requests'] += 1
+
+        results = []
+        for call in calls:
+            relative = urlparse(call['relative_url'])
+            path = [part for part in relative.path.split('/') if part]
+            if path and path[0].startswith('v') and '.' in path[0]:
+                path = path[1:]
+            params = {key: values[0] for key, values in parse_qs(relative.query).items()}
+            params.update({key: values[0] for key, values in parse_qs(call.get('body', '')).items()})
+
+            status, payload, headers = self.handle_call(call['method'], path, params, count=False)
+            results.append({
+                'code': status,
+                'headers': [{'name': name, 'value': value} for name, value in headers.items()],
+                'body': json.dumps(payload),
+            })
+
+        return 200, results, {}
+
+    def handle_call(self, method, path, params, count):
+        with self.lock:
+            if count:
+                self.counts['http_requests'] += 1
+            self.counts['calls'] += 1
+
+        allowed, usage_pct, reset = self.register_calls(1)
+        headers = self.usage_headers(usage_pct, reset)
+        if not allowed:
+            with self.lock:
+                self.counts['throttled'] += 1
+            return 400, self.throttled_body(), headers
+
+        if method == 'GET' and len(path) == 2 and path[1] in ('adsets', 'campaigns'):
+            with self.lock:
+                self.counts['reads'] += 1
+            return 200, self.list_edge(path[0], path[1], params), headers
+
+        if method == 'POST' and len(path) == 1:
+            with self.lock:
+                self.counts['writes'] += 1
+            return self.update_object(path[0], params) + (headers,)
+
+        return 400, {'error': {'message': f"Unsupported fake call {method} /{'/'.join(path)}",
+                               'type': 'GraphMethodException', 'code': 100}}, headers
+
+    def list_edge(self, node_id, edge, params):
+        fields = params.get('fields', '')
+        limit = min(int(params.get('limit', 25)), self.page_limit)
+        offset = int(base64.b64decode(params['after']).decode()) if params.get('after') else 0
+
+        if edge == 'campaigns':
+            nodes = [self.account.campaign_node(c, fields) for c in self.account.campaigns.values()]
+        elif node_id == self.account.account_id:
+            nodes = [self.account.adset_node(a, fields) for a in self.account.adsets.values()]
+        else:
+            nodes = [self.account.adset_node(a, fields) for a in self.account.adsets.values()
+                     if a['campaign_id'] == node_id]
+
+        page = nodes[offset:offset + limit]
+        after = base64.b64encode(str(offset + len(page)).encode()).decode()
+        response = {'data': page, 'paging': {'cursors': {'before': 'MA==', 'after': after}}}
+        if offset + limit < len(nodes):
+            response['paging']['next'] = f"{GRAPH_URL}/v0/{node_id}/{edge}?after={after}"
+        return response
+
+    def update_object(self, obj_id, params):
+        target = self.account.adsets.get(obj_id) or self.account.campaigns.get(obj_id)
+        if target is None:
+            return 400, {'error': {'message': f"Unknown object {obj_id}", 'type': 'GraphMethodException', 'code': 100}}
+        if 'daily_budget' in params:
+            with self.lock:
+                target['daily_budget'] = str(params['daily_budget'])
+        return 200, {'success': True}
+
+    def build_response(self, request, status, payload, headers):
+        response = Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode()
+        response.headers = CaseInsensitiveDict({'content-type': 'application/json', **headers})
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Concurrent budget executor - applies budget updates from a bounded thread pool
+Reads Facebook's rate-limit usage headers and adapts concurrency to stay under throttling
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Graph API error codes that mean "slow down"
+# 4 = app limit, 17 = user limit, 32 = page limit, 613 = custom limit,
+# 80000-80014 = business use case limits (ads management, insights, ...)
+RATE_LIMIT_ERROR_CODES = {4, 17, 32, 613} | set(range(80000, 80015))
+
+# Usage percentages that trigger throttling changes
+SLOW_DOWN_PCT = 75
+PAUSE_PCT = 90
+SPEED_UP_PCT = 50
+
+
+def parse_usage_headers(headers):
+    """
+    Read x-business-use-case-usage / x-ad-account-usage / x-app-usage headers
+
+    Returns (usage_pct, regain_seconds): the highest utilization across all
+    headers (0-100) and how long Facebook says to wait before full access.
+    Batch responses carry their headers as a [{'name': ..., 'value': ...}] list.
+    """
+    usage_pct = 0.0
+    regain_seconds = 0.0
+
+    if not headers:
+        return usage_pct, regain_seconds
+
+    if isinstance(headers, list):
+        headers = {header['name'].lower(): header['value'] for header in headers}
+
+    business_usage = _load_header(headers, 'x-business-use-case-usage')
+    for entries in (business_usage or {}).values():
+        for entry in entries:
+            usage_pct = max(
+                usage_pct,
+                entry.get('call_count', 0),
+                entry.get('total_cputime', 0),
+                entry.get('total_time', 0)
+            )
+            regain_seconds = max(regain_seconds, entry.get('estimated_time_to_regain_access', 0) * 60)
+
+    account_usage = _load_header(headers, 'x-ad-account-usage')
+    if account_usage:
+        usage_pct = max(usage_pct, account_usage.get('acc_id_util_pct', 0))
+        regain_seconds = max(regain_seconds, account_usage.get('reset_time_duration', 0))
+
+    app_usage = _load_header(headers, 'x-app-usage')
+    if app_usage:
+        usage_pct = max(
+            usage_pct,
+            app_usage.get('call_count', 0),
+            app_usage.get('total_cputime', 0),
+            app_usage.get('total_time', 0)
+        )
+
+    return float(usage_pct), float(regain_seconds)
+
+
+def _load_header(headers, name):
+    """Parse a JSON usage header, tolerating missing or malformed values"""
+    value = headers.get(name)
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit_error(error):
+    """Check whether a FacebookRequestError is a throttling error"""
+    code = getattr(error, 'api_error_code', lambda: None)()
+    return code in RATE_LIMIT_ERROR_CODES
+
+
+class AdaptiveThrottle:
+    """
+    Concurrency limiter driven by Facebook usage headers
+
+    Workers call acquire()/release() around each request and report the
+    response headers through observe(). High usage shrinks the number of
+    requests allowed in flight, a throttling error pauses everyone.
+    """
+
+    def __init__(self, max_workers, min_workers=1, default_backoff=60):
+        self.max_workers = max_workers
+        self.min_workers = min_workers
+        self.default_backoff = default_backoff
+        self.limit = max_workers
+        self.active = 0
+        self.paused_until = 0.0
+        self.peak_usage = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until a request slot is free and no pause is in effect"""
+        with self._cond:
+            while True:
+                delay = self.paused_until - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                if self.active < self.limit:
+                    self.active += 1
+                    return
+                self._cond.wait()
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def wait_if_paused(self):
+        """Sleep out any pause without giving up the current slot"""
+        with self._cond:
+            delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def observe(self, headers):
+        """Adjust concurrency from the usage headers of a response"""
+        usage_pct, regain_seconds = parse_usage_headers(headers)
+
+        with self._cond:
+            self.peak_usage = max(self.peak_usage, usage_pct)
+
+            if usage_pct >= PAUSE_PCT:
+                self.limit = self.min_workers
+                pause = regain_seconds or self.default_backoff * (usage_pct / 100)
+                self._pause(pause)
+                print(f"  ⏸️  API usage at {usage_pct:.0f}% - pausing {pause:.0f}s")
+            elif usage_pct >= SLOW_DOWN_PCT:
+                self.limit = max(self.min_workers, self.limit // 2)
+            elif usage_pct < SPEED_UP_PCT and self.limit < self.max_workers:
+                self.limit += 1
+
+            self._cond.notify_all()
+
+    def backoff(self, error):
+        """Pause all workers after a throttling error"""
+        headers = getattr(error, 'http_headers', lambda: None)() or {}
+        _, regain_seconds = parse_usage_headers(headers)
+        pause = regain_seconds or self.default_backoff
+
+        with self._cond:
+            self.limit = self.min_workers
+            self._pause(pause)
+            self._cond.notify_all()
+
+        print(f"  ⏸️  Rate limited by Facebook - pausing {pause:.0f}s")
+
+    def _pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class ConcurrentBudgetExecutor:
+    """Run BudgetScheduler.update_single_budget calls from a bounded thread pool"""
+
+    def __init__(self, scheduler, max_workers=8):
+        self.scheduler = scheduler
+        self.max_workers = max_workers
+        self.throttle = AdaptiveThrottle(max_workers)
+
+    def run(self, changes):
+        """
+        Apply pending changes concurrently
+
+        Results are returned in the same order as changes, regardless of
+        completion order, so the summary and state file stay deterministic.
+        """
+        if not changes:
+            return []
+
+        print(f"  🧵 Applying {len(changes)} update(s) with up to {self.max_workers} workers...")
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(self._apply, changes))
+
+        elapsed = time.monotonic() - started
+        print(f"  ⏱️  Updates finished in {elapsed:.1f}s (peak API usage {self.throttle.peak_usage:.0f}%)")
+
+        return results
+
+    def _apply(self, change):
+        self.throttle.acquire()
+        try:
+            return self.scheduler.update_single_budget(
+                change['id'],
+                change['name'],
+                change['current_budget'],
+                change['new_budget'],
+                change['type'],
+                throttle=self.throttle
+            )
+        finally:
+            self.throttle.release()
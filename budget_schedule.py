@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Budget schedule - dayparting windows compiled into a weekly transition table
+
+config.json "schedule":
+    "nightly_time": "00:00",          # default window when "windows" is not set
+    "daytime_time": "07:00",
+    "windows": [                      # reduced-budget windows for every day
+        {"start": "00:00", "end": "07:00"},
+        {"start": "22:30", "end": "23:30", "amount": 3000}
+    ],
+    "weekdays": {                     # optional per-weekday replacement windows
+        "sat": [{"start": "01:00", "end": "09:00"}],
+        "sun": []
+    },
+    "campaign_overrides": {           # optional per-campaign profiles
+        "120210000000000": {"windows": [{"start": "20:00", "end": "08:00"}]}
+    }
+
+A window runs from start up to (not including) end and may cross midnight;
+it belongs to the weekday it starts on (start and end must differ). Inside a
+window an object is cut to the window's "amount" (cents, default
+budgets.nightly_amount); outside all windows it is restored to its original
+budget. A campaign override falls back to its own "windows", then to the
+account profile, for weekdays it does not list. Overlapping windows take the
+lowest amount.
+
+Everything is compiled once into a sorted table of minute-of-week
+boundaries and a (segment x profile) matrix of target amounts, so the
+target for every object at a given time is one binary search plus a
+vectorized row lookup.
+"""
+
+from bisect import bisect_right
+from datetime import timedelta, timezone
+import numpy as np
+
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Target amount meaning "restore the stored original budget"
+RESTORE = -1
+
+DEFAULT_PROFILE = 'default'
+
+
+def parse_time(value):
+    """'HH:MM' -> minutes after midnight"""
+    try:
+        hours, minutes = value.split(':')
+        hours, minutes = int(hours), int(minutes)
+    except (AttributeError, ValueError):
+        raise Exception(f"Invalid schedule time '{value}' (expected HH:MM)")
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise Exception(f"Invalid schedule time '{value}' (expected HH:MM)")
+    return hours * 60 + minutes
+
+
+def minute_of_week(now):
+    """Minutes since Monday 00:00 in now's own (local, DST-aware) wall clock"""
+    return now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+
+
+class BudgetSchedule:
+    def __init__(self, schedule, nightly_amount):
+        self.nightly_amount = nightly_amount
+
+        # Profile 0 is the account-wide schedule, the rest are campaign overrides
+        default = dict(schedule)
+        if 'windows' not in default:
+            default['windows'] = [{'start': schedule['nightly_time'], 'end': schedule['daytime_time']}]
+        overrides = schedule.get('campaign_overrides', {})
+
+        self.profiles = [DEFAULT_PROFILE] + list(overrides)
+        self.profile_index = {profile: i for i, profile in enumerate(self.profiles)}
+
+        intervals = [self.compile_profile(default)]
+        for campaign_id in overrides:
+            intervals.append(self.compile_profile(overrides[campaign_id], fallback=default))
+
+        self.boundaries, self.amounts = self.build_table(intervals)
+        self.reduced_amounts = set(int(a) for a in np.unique(self.amounts) if a != RESTORE)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['schedule'], config['budgets']['nightly_amount'])
+
+    def day_windows(self, profile, day, fallback=None):
+        weekdays = profile.get('weekdays', {})
+        if WEEKDAYS[day] in weekdays:
+            return weekdays[WEEKDAYS[day]]
+        if 'windows' in profile:
+            return profile['windows']
+        return self.day_windows(fallback, day) if fallback else []
+
+    def compile_profile(self, profile, fallback=None):
+        """Profile windows -> list of (start, end, amount) in minutes of the week"""
+        intervals = []
+        for day in range(7):
+            for window in self.day_windows(profile, day, fallback):
+                start = day * MINUTES_PER_DAY + parse_time(window['start'])
+                end = day * MINUTES_PER_DAY + parse_time(window['end'])
+                if end == start:
+                    raise Exception(f"Invalid schedule window {window['start']}-{window['end']} (start and end are equal)")
+                if end < start:
+                    end += MINUTES_PER_DAY  # crosses midnight
+                amount = int(window.get('amount', self.nightly_amount))
+
+                # Sunday night windows wrap around to Monday morning
+                if end > MINUTES_PER_WEEK:
+                    intervals.append((start, MINUTES_PER_WEEK, amount))
+                    intervals.append((0, end - MINUTES_PER_WEEK, amount))
+                else:
+                    intervals.append((start, end, amount))
+        return intervals
+
+    def build_table(self, profile_intervals):
+        """Sorted segment starts plus the target amount of every profile in every segment"""
+        points = {0}
+        for intervals in profile_intervals:
+            for start, end, _ in intervals:
+                points.add(start)
+                if end < MINUTES_PER_WEEK:
+                    points.add(end)
+        boundaries = sorted(points)
+
+        amounts = np.full((len(boundaries), len(profile_intervals)), RESTORE, dtype=np.int64)
+        for column, intervals in enumerate(profile_intervals):
+            for start, end, amount in intervals:
+                lo = bisect_right(boundaries, start) - 1
+                hi = bisect_right(boundaries, end - 1)
+                segment = amounts[lo:hi, column]
+                amounts[lo:hi, column] = np.where(segment == RESTORE, amount, np.minimum(segment, amount))
+
+        # Merge consecutive segments with identical targets
+        keep = np.ones(len(boundaries), dtype=bool)
+        keep[1:] = np.any(amounts[1:] != amounts[:-1], axis=1)
+        return [b for b, k in zip(boundaries, keep) if k], amounts[keep]
+
+    def segment_at(self, now):
+        return bisect_right(self.boundaries, minute_of_week(now)) - 1
+
+    def targets_at(self, now, campaign_ids):
+        """
+        Target amount for every object at now (RESTORE = back to the original budget)
+
+        campaign_ids: the campaign of each object (campaigns without an
+        override follow the account-wide profile)
+        """
+        columns = np.fromiter(
+            (self.profile_index.get(campaign_id, 0) for campaign_id in campaign_ids),
+            dtype=np.intp, count=len(campaign_ids)
+        )
+        return self.amounts[self.segment_at(now)][columns]
+
+    def mode_at(self, now, campaign_id=None):
+        """'nightly' inside a reduced-budget window, else 'daytime'"""
+        column = self.profile_index.get(campaign_id, 0)
+        return 'nightly' if self.amounts[self.segment_at(now), column] != RESTORE else 'daytime'
+
+    def key_at(self, now):
+        """
+        Identifies the scheduled targets at now; a run is needed when it changes
+
+        Plain single-window schedules keep the familiar 'nightly'/'daytime'
+        values stored as last_mode in the state file.
+        """
+        row = self.amounts[self.segment_at(now)]
+        mode = 'nightly' if row[0] != RESTORE else 'daytime'
+        if len(row) == 1 and row[0] in (RESTORE, self.nightly_amount):
+            return mode
+        return f"{mode}:" + ",".join(str(int(amount)) for amount in row)
+
+    def next_transition(self, now):
+        """
+        When the scheduled targets next change, as an aware datetime in now's timezone
+
+        The boundary is found in wall-clock minutes and localized afterwards,
+        so 00:00 stays 00:00 across DST changes (a boundary inside the skipped
+        spring-forward hour fires at the first valid minute after it).
+        """
+        current = minute_of_week(now)
+        i = bisect_right(self.boundaries, current)
+        target = self.boundaries[i] if i < len(self.boundaries) else self.boundaries[0] + MINUTES_PER_WEEK
+        if len(self.boundaries) == 1:
+            target = current + MINUTES_PER_WEEK  # constant schedule, check again in a week
+
+        wall = now.replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=target - current)
+        return localize(now.tzinfo, wall)
+
+    def segment_start(self, now):
+        """
+        When the scheduled targets at now took effect, as an aware datetime in now's timezone
+
+        A window crossing Sunday midnight starts on Sunday, not at the week boundary.
+        """
+        current = minute_of_week(now)
+        i = self.segment_at(now)
+        start = self.boundaries[i]
+        if len(self.boundaries) == 1:
+            start = current - MINUTES_PER_WEEK  # constant schedule
+        elif i == 0 and np.array_equal(self.amounts[0], self.amounts[-1]):
+            start = self.boundaries[-1] - MINUTES_PER_WEEK
+
+        wall = now.replace(tzinfo=None, second=0, microsecond=0) - timedelta(minutes=current - start)
+        return localize(now.tzinfo, wall)
+
+    def reduced_hours(self, campaign_id=None):
+        """Boolean array of the 24 hours of the day that start inside a reduced window on any weekday"""
+        column = self.profile_index.get(campaign_id, 0)
+        hour_starts = np.arange(7 * 24) * 60
+        segments = np.searchsorted(self.boundaries, hour_starts, side='right') - 1
+        reduced = self.amounts[segments, column] != RESTORE
+        return reduced.reshape(7, 24).any(axis=0)
+
+    def describe(self):
+        """Human-readable windows of every profile, one line per window"""
+        lines = []
+        for column, profile in enumerate(self.profiles):
+            for i, start in enumerate(self.boundaries):
+                amount = self.amounts[i, column]
+                if amount == RESTORE:
+                    continue
+                end = self.boundaries[i + 1] if i + 1 < len(self.boundaries) else MINUTES_PER_WEEK
+                lines.append(f"{profile}: {format_minute(start)} → {format_minute(end)} ${amount/100:.2f}")
+        return lines
+
+
+def localize(tz, wall):
+    """Attach tz to a naive wall-clock time (pytz and zoneinfo timezones)"""
+    if hasattr(tz, 'localize'):
+        return tz.normalize(tz.localize(wall))
+    return wall.replace(tzinfo=tz).astimezone(timezone.utc).astimezone(tz)
+
+
+def format_minute(minute):
+    """Minute of the week -> 'mon 00:00'"""
+    day, minute = divmod(minute % MINUTES_PER_WEEK, MINUTES_PER_DAY)
+    return f"{WEEKDAYS[day]} {minute // 60:02d}:{minute % 60:02d}"
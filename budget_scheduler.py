@@ -12,6 +12,9 @@ from facebook_business.api import FacebookAdsApi
 from facebook_business.adobjects.adaccount import AdAccount
 from facebook_business.adobjects.campaign import Campaign
 from facebook_business.adobjects.adset import AdSet
+from account_discovery import get_budget_objects
+from accounts import get_accounts
+from budget_schedule import BudgetSchedule
 
 # Load environment variables
 load_dotenv()
@@ -19,13 +22,14 @@ load_dotenv()
 class BudgetScheduler:
     def __init__(self, config_path='config.json'):
         self.config = self.load_config(config_path)
+        self.account_info = get_accounts(self.config)[0]
         self.access_token = os.getenv('FACEBOOK_ACCESS_TOKEN')
         
         if not self.access_token:
             raise Exception("FACEBOOK_ACCESS_TOKEN not found in .env file")
         
         FacebookAdsApi.init(access_token=self.access_token)
-        self.ad_account_id = 'act_24590952'
+        self.ad_account_id = self.account_info['id']
         self.account = AdAccount(self.ad_account_id)
         
         # Set timezone
@@ -41,16 +45,8 @@ class BudgetScheduler:
         now = datetime.now(self.timezone)
         current_time = now.strftime("%H:%M")
         
-        nightly_time = self.config['schedule']['nightly_time']
-        daytime_time = self.config['schedule']['daytime_time']
-        
-        # Convert times to comparable format
-        current_hour = now.hour
-        nightly_hour = int(nightly_time.split(':')[0])
-        daytime_hour = int(daytime_time.split(':')[0])
-        
-        # Nightly period is from nightly_time to daytime_time
-        if nightly_hour <= current_hour < daytime_hour:
+        # Windows may cross midnight and are matched to the minute
+        if BudgetSchedule.from_config(self.config).mode_at(now) == 'nightly':
             budget_type = 'nightly'
             amount = self.config['budgets']['nightly_amount']
         else:
@@ -63,62 +59,7 @@ class BudgetScheduler:
         """Fetch all active campaigns and their ad sets"""
         print("📊 Fetching active campaigns and ad sets...")
         
-        campaigns = self.account.get_campaigns(
-            fields=['id', 'name', 'status', 'daily_budget', 'lifetime_budget'],
-            params={'effective_status': ['ACTIVE']}
-        )
-        
-        results = {
-            'campaign_budgets': [],  # Campaigns with budget at campaign level
-            'adset_budgets': []      # Ad sets with budget at ad set level
-        }
-        
-        for campaign in campaigns:
-            campaign_id = campaign.get('id')
-            campaign_name = campaign.get('name')
-            campaign_daily_budget = campaign.get('daily_budget')
-            
-            # Check if excluded
-            if campaign_id in self.config['excluded_campaigns']:
-                print(f"  ⏭️  Skipping excluded campaign: {campaign_name}")
-                continue
-            
-            # If campaign has budget set at campaign level
-            if campaign_daily_budget:
-                results['campaign_budgets'].append({
-                    'id': campaign_id,
-                    'name': campaign_name,
-                    'current_budget': int(campaign_daily_budget),
-                    'type': 'campaign'
-                })
-            else:
-                # Check ad sets within this campaign
-                campaign_obj = Campaign(campaign_id)
-                adsets = campaign_obj.get_ad_sets(
-                    fields=['id', 'name', 'status', 'daily_budget', 'lifetime_budget'],
-                    params={'effective_status': ['ACTIVE']}
-                )
-                
-                for adset in adsets:
-                    adset_id = adset.get('id')
-                    adset_name = adset.get('name')
-                    adset_daily_budget = adset.get('daily_budget')
-                    
-                    # Check if excluded
-                    if adset_id in self.config['excluded_adsets']:
-                        print(f"  ⏭️  Skipping excluded ad set: {adset_name}")
-                        continue
-                    
-                    if adset_daily_budget:
-                        results['adset_budgets'].append({
-                            'id': adset_id,
-                            'name': adset_name,
-                            'campaign_name': campaign_name,
-                            'current_budget': int(adset_daily_budget),
-                            'type': 'adset'
-                        })
-        
-        return results
+        return get_budget_objects(self.account, self.config)
     
     def update_budgets(self, target_budget):
         """Update budgets for all active campaigns/ad sets"""
@@ -6,22 +6,47 @@ Now with smart budget restoration - remembers original budgets and restores them
 
 import os
 import json
+import time
 from datetime import datetime
 import pytz
 from dotenv import load_dotenv
 from facebook_business.api import FacebookAdsApi
+from facebook_business.exceptions import FacebookRequestError
 from facebook_business.adobjects.adaccount import AdAccount
 from facebook_business.adobjects.campaign import Campaign
 from facebook_business.adobjects.adset import AdSet
+from account_discovery import get_budget_objects, open_snapshot
+from budget_executor import ConcurrentBudgetExecutor, AdaptiveThrottle, is_rate_limit_error
+from budget_state_store import create_state_store
+from budget_schedule import BudgetSchedule, RESTORE
+from nightly_optimizer import NightlyBudgetOptimizer, optimizer_settings
+from accounts import get_accounts, account_config, namespaced_path, run_per_account
 
 # Load environment variables
 load_dotenv()
 
+# Graph API accepts at most 50 requests per batch call
+BATCH_SIZE = 50
+
+# Prefetched objects older than this are fetched again at the transition
+PREFETCH_MAX_AGE = 300
+
 class BudgetScheduler:
-    def __init__(self, config_path='config.json', state_path='budget_state.json'):
-        self.config = self.load_config(config_path)
-        self.state_path = state_path
-        self.state = self.load_state()
+    def __init__(self, config_path='config.json', state_path='budget_state.json', account=None):
+        config = self.load_config(config_path)
+        
+        # Each account gets its own merged config and state namespace
+        account = account or get_accounts(config)[0]
+        self.account_name = account.get('name', account['id'])
+        self.config = account_config(config, account)
+        self.state_path = namespaced_path(config, account['id'], state_path)
+        self.store = create_state_store(self.config.get('state_backend', 'journal'), self.state_path)
+        self.state = self.store.state
+        self.run_mode = None
+        
+        # Kept warm between runs by the daemon (scheduler_daemon.py)
+        self.snapshot = None
+        self.prefetched = None
         
         self.access_token = os.getenv('FACEBOOK_ACCESS_TOKEN')
         
@@ -29,11 +54,14 @@ class BudgetScheduler:
             raise Exception("FACEBOOK_ACCESS_TOKEN not found in .env file")
         
         FacebookAdsApi.init(access_token=self.access_token)
-        self.ad_account_id = 'act_24590952'
+        self.ad_account_id = account['id']
         self.account = AdAccount(self.ad_account_id)
         
         # Set timezone
         self.timezone = pytz.timezone(self.config['timezone'])
+        
+        # Dayparting windows compiled once into a transition table
+        self.schedule = BudgetSchedule.from_config(self.config)
     
     def load_config(self, config_path):
         """Load configuration from JSON file"""
@@ -41,217 +69,182 @@ class BudgetScheduler:
             return json.load(f)
     
     def load_state(self):
-        """Load state file (stored budgets)"""
-        try:
-            with open(self.state_path, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {
-                'original_budgets': {},
-                'last_run': None,
-                'last_mode': None
-            }
+        """Reload state (stored budgets) from the state store"""
+        self.store.state = self.store.load()
+        self.state = self.store.state
+        return self.state
     
     def save_state(self):
-        """Save state file"""
-        with open(self.state_path, 'w') as f:
-            json.dump(self.state, f, indent=2)
+        """Save a full state snapshot (atomic)"""
+        self.store.save()
     
     def get_current_budget_mode(self):
         """Determine which mode we should be in based on current time"""
         now = datetime.now(self.timezone)
-        current_time = now.strftime("%H:%M")
-        
-        nightly_time = self.config['schedule']['nightly_time']
-        daytime_time = self.config['schedule']['daytime_time']
-        
-        # Convert times to comparable format
-        current_hour = now.hour
-        nightly_hour = int(nightly_time.split(':')[0])
-        daytime_hour = int(daytime_time.split(':')[0])
-        
-        # Nightly period is from nightly_time to daytime_time
-        if nightly_hour <= current_hour < daytime_hour:
-            return 'nightly', current_time
-        else:
-            return 'daytime', current_time
+        return self.schedule.mode_at(now), now.strftime("%H:%M")
     
     def get_active_campaigns_and_adsets(self):
         """Fetch all active campaigns and their ad sets"""
         print("📊 Fetching active campaigns and ad sets...")
         
-        campaigns = self.account.get_campaigns(
-            fields=['id', 'name', 'status', 'daily_budget', 'lifetime_budget'],
-            params={'effective_status': ['ACTIVE']}
-        )
-        
-        results = {
-            'campaign_budgets': [],  # Campaigns with budget at campaign level
-            'adset_budgets': []      # Ad sets with budget at ad set level
-        }
-        
-        for campaign in campaigns:
-            campaign_id = campaign.get('id')
-            campaign_name = campaign.get('name')
-            campaign_daily_budget = campaign.get('daily_budget')
-            
-            # Check if excluded
-            if campaign_id in self.config['excluded_campaigns']:
-                print(f"  ⏭️  Skipping excluded campaign: {campaign_name}")
-                continue
-            
-            # If campaign has budget set at campaign level
-            if campaign_daily_budget:
-                results['campaign_budgets'].append({
-                    'id': campaign_id,
-                    'name': campaign_name,
-                    'current_budget': int(campaign_daily_budget),
-                    'type': 'campaign'
-                })
-            else:
-                # Check ad sets within this campaign
-                campaign_obj = Campaign(campaign_id)
-                adsets = campaign_obj.get_ad_sets(
-                    fields=['id', 'name', 'status', 'daily_budget', 'lifetime_budget'],
-                    params={'effective_status': ['ACTIVE']}
-                )
-                
-                for adset in adsets:
-                    adset_id = adset.get('id')
-                    adset_name = adset.get('name')
-                    adset_daily_budget = adset.get('daily_budget')
-                    
-                    # Check if excluded
-                    if adset_id in self.config['excluded_adsets']:
-                        print(f"  ⏭️  Skipping excluded ad set: {adset_name}")
-                        continue
-                    
-                    if adset_daily_budget:
-                        results['adset_budgets'].append({
-                            'id': adset_id,
-                            'name': adset_name,
-                            'campaign_name': campaign_name,
-                            'current_budget': int(adset_daily_budget),
-                            'type': 'adset'
-                        })
-        
-        return results
+        if self.config.get('discovery_mode') == 'delta' and self.snapshot is None:
+            self.snapshot = open_snapshot(self.account, self.config)
+        return get_budget_objects(self.account, self.config, snapshot=self.snapshot)
+    
+    def prefetch_objects(self):
+        """Fetch the account ahead of a transition so the switch itself only sends updates"""
+        self.prefetched = (time.time(), self.get_active_campaigns_and_adsets())
+    
+    def take_prefetched(self, max_age=PREFETCH_MAX_AGE):
+        """Objects from prefetch_objects if they are recent enough (used once)"""
+        prefetched, self.prefetched = self.prefetched, None
+        if prefetched and time.time() - prefetched[0] <= max_age:
+            print("📊 Using active campaigns and ad sets fetched ahead of the transition")
+            return prefetched[1]
+        return None
+    
+    def get_run_objects(self, mode):
+        """
+        Objects for a nightly/daytime switch, resuming an interrupted run if there is one
+        
+        Returns (results, done_ids). A fresh run fetches the account and
+        checkpoints the object list; a resumed run reuses that list (so the
+        budgets are the ones seen before any change) and skips finished ids.
+        """
+        self.run_mode = mode
+        pending = self.store.get_pending_run(mode)
+        
+        if pending and self.is_stale_run(pending):
+            # Started in an earlier window: its objects and budgets are out of date
+            print(f"🧹 Discarding unfinished {mode} run started {pending['started']} (before the current window)")
+            pending = None
+        
+        if pending:
+            done = set(pending['done'])
+            total = len(pending['objects']['campaign_budgets']) + len(pending['objects']['adset_budgets'])
+            print(f"♻️  Resuming {mode} run started {pending['started']} ({len(done)}/{total} object(s) already updated)")
+            return pending['objects'], done
+        
+        results = self.take_prefetched() or self.get_active_campaigns_and_adsets()
+        self.store.start_run(mode, results)
+        return results, set()
+    
+    def is_stale_run(self, pending):
+        """True if a pending run was started before the current schedule window began"""
+        window_start = self.schedule.segment_start(datetime.now(self.timezone))
+        # 'started' is a naive local timestamp (datetime.now().isoformat())
+        started = datetime.fromisoformat(pending['started'])
+        if started.tzinfo is None:
+            started = started.astimezone()
+        return started < window_start
     
     def apply_nightly_budgets(self):
         """Lower budgets to nightly amount and store originals"""
         nightly_amount = self.config['budgets']['nightly_amount']
-        results = self.get_active_campaigns_and_adsets()
-        
-        updates_made = []
+        results, done = self.get_run_objects('nightly')
+        items = results['campaign_budgets'] + results['adset_budgets']
         
-        print(f"\n💤 Applying nightly budgets (${nightly_amount/100:.2f})...")
+        targets = [nightly_amount] * len(items)
+        if optimizer_settings(self.config)['enabled']:
+            print(f"\n💤 Applying performance-based nightly budgets...")
+            try:
+                optimizer = NightlyBudgetOptimizer(self.account, self.config, self.schedule)
+                targets = optimizer.nightly_budgets(items, [self.original_for(item) for item in items])
+            except Exception as e:
+                # The run is already checkpointed; a failed fit must not block the nightly cut
+                print(f"  ⚠️  Nightly optimizer failed ({str(e)}) - using the flat nightly amount (${nightly_amount/100:.2f})")
+        else:
+            print(f"\n💤 Applying nightly budgets (${nightly_amount/100:.2f})...")
         print("   (Storing original budgets for morning restoration)")
         
-        # Process campaign-level budgets
-        for item in results['campaign_budgets']:
-            obj_id = item['id']
-            current_budget = item['current_budget']
-            
-            # Store original budget if not already stored or if it changed
-            if obj_id not in self.state['original_budgets'] or \
-               self.state['original_budgets'][obj_id] != current_budget:
-                self.state['original_budgets'][obj_id] = current_budget
-                print(f"  💾 Stored original budget for campaign '{item['name']}': ${current_budget/100:.2f}")
-            
-            # Only update if current budget is different from nightly
-            if current_budget != nightly_amount:
-                updates_made.append(self.update_single_budget(
-                    obj_id,
-                    item['name'],
-                    current_budget,
-                    nightly_amount,
-                    'campaign'
-                ))
-        
-        # Process ad set-level budgets
-        for item in results['adset_budgets']:
-            obj_id = item['id']
-            current_budget = item['current_budget']
-            
-            # Store original budget if not already stored or if it changed
-            if obj_id not in self.state['original_budgets'] or \
-               self.state['original_budgets'][obj_id] != current_budget:
-                self.state['original_budgets'][obj_id] = current_budget
-                print(f"  💾 Stored original budget for ad set '{item['name']}': ${current_budget/100:.2f}")
-            
-            # Only update if current budget is different from nightly
-            if current_budget != nightly_amount:
-                updates_made.append(self.update_single_budget(
-                    obj_id,
-                    item['name'],
-                    current_budget,
-                    nightly_amount,
-                    'adset'
-                ))
-        
-        # Save state after storing originals
-        self.save_state()
-        
-        return updates_made
+        return self.apply_targets(items, targets, done)
     
     def apply_daytime_budgets(self):
         """Restore budgets to their original amounts"""
-        results = self.get_active_campaigns_and_adsets()
-        
-        updates_made = []
+        results, done = self.get_run_objects('daytime')
+        items = results['campaign_budgets'] + results['adset_budgets']
         
         print(f"\n☀️  Applying daytime budgets (restoring to originals)...")
         
-        # Process campaign-level budgets
-        for item in results['campaign_budgets']:
+        return self.apply_targets(items, [RESTORE] * len(items), done)
+    
+    def apply_scheduled_budgets(self, now, key):
+        """Move every object to the budget its schedule profile sets for now"""
+        results, done = self.get_run_objects(key)
+        items = results['campaign_budgets'] + results['adset_budgets']
+        
+        targets = self.schedule.targets_at(now, [item.get('campaign_id', item['id']) for item in items])
+        reduced = int((targets != RESTORE).sum())
+        print(f"\n🗓️  Applying scheduled budgets ({reduced} reduced, {len(items) - reduced} restored)...")
+        
+        return self.apply_targets(items, targets, done)
+    
+    def apply_targets(self, items, targets, done):
+        """
+        Queue the change for every object whose budget differs from its target
+        
+        A target in cents lowers the budget (storing the original first);
+        RESTORE puts the stored original back.
+        """
+        pending = []
+        
+        for item, target in zip(items, targets):
             obj_id = item['id']
             current_budget = item['current_budget']
+            label = 'campaign' if item['type'] == 'campaign' else 'ad set'
+            target = int(target)
             
-            # Get original budget from state
-            original_budget = self.state['original_budgets'].get(obj_id)
-            
-            if original_budget is None:
-                # No stored original, keep current
-                print(f"  ⚠️  No stored budget for campaign '{item['name']}', keeping current: ${current_budget/100:.2f}")
+            if target == RESTORE:
+                # Get original budget from state
+                original_budget = self.store.get_original(obj_id)
+                
+                if original_budget is None:
+                    # No stored original, keep current
+                    print(f"  ⚠️  No stored budget for {label} '{item['name']}', keeping current: ${current_budget/100:.2f}")
+                    continue
+                
+                # Only update if current is different from original
+                if current_budget != original_budget and obj_id not in done:
+                    pending.append(self.make_change(item, original_budget))
                 continue
             
-            # Only update if current is different from original
-            if current_budget != original_budget:
-                updates_made.append(self.update_single_budget(
-                    obj_id,
-                    item['name'],
-                    current_budget,
-                    original_budget,
-                    'campaign'
-                ))
-        
-        # Process ad set-level budgets
-        for item in results['adset_budgets']:
-            obj_id = item['id']
-            current_budget = item['current_budget']
-            
-            # Get original budget from state
-            original_budget = self.state['original_budgets'].get(obj_id)
-            
-            if original_budget is None:
-                # No stored original, keep current
-                print(f"  ⚠️  No stored budget for ad set '{item['name']}', keeping current: ${current_budget/100:.2f}")
-                continue
+            # Store original budget if not already stored or if it changed
+            original_budget = self.original_for(item)
+            if original_budget != self.store.get_original(obj_id):
+                self.store.set_original(obj_id, original_budget)
+                print(f"  💾 Stored original budget for {label} '{item['name']}': ${current_budget/100:.2f}")
             
-            # Only update if current is different from original
-            if current_budget != original_budget:
-                updates_made.append(self.update_single_budget(
-                    obj_id,
-                    item['name'],
-                    current_budget,
-                    original_budget,
-                    'adset'
-                ))
-        
-        return updates_made
+            # Only update if current budget is different from the target
+            if current_budget != target and obj_id not in done:
+                pending.append(self.make_change(item, target))
+        
+        # Originals must be durable before any budget is lowered
+        self.store.checkpoint()
+        
+        return self.apply_budget_changes(pending)
     
-    def update_single_budget(self, obj_id, name, current_budget, new_budget, obj_type):
-        """Update budget for a single campaign or ad set"""
+    def original_for(self, item):
+        """
+        Budget an object is restored to once this run stores its original
+        
+        Any budget that differs from the stored original replaces it (an
+        operator's edit, up or down), except the exact budget this scheduler
+        last wrote to the object: that is its own nightly/optimized cut left in
+        place by a failed or skipped restore, not a new original.
+        """
+        original_budget = self.store.get_original(item['id'])
+        current_budget = item['current_budget']
+        if original_budget is not None and current_budget == self.store.get_applied(item['id']):
+            return original_budget
+        return current_budget
+    
+    def update_single_budget(self, obj_id, name, current_budget, new_budget, obj_type, throttle=None):
+        """
+        Update budget for a single campaign or ad set
+
+        When a throttle is given (concurrent mode), the response usage headers
+        are reported to it and throttling errors are retried after its backoff.
+        """
         dry_run = self.config.get('dry_run', True)
         
         update_info = {
@@ -260,6 +253,7 @@ class BudgetScheduler:
             'type': obj_type,
             'old_budget': current_budget / 100,
             'new_budget': new_budget / 100,
+            'target': new_budget,
             'success': False
         }
         
@@ -269,29 +263,220 @@ class BudgetScheduler:
             update_info['dry_run'] = True
         else:
             try:
-                if obj_type == 'campaign':
-                    obj = Campaign(obj_id)
+                if throttle is not None:
+                    self.send_budget_update(obj_id, new_budget, throttle)
                 else:
-                    obj = AdSet(obj_id)
-                
-                obj.api_update(params={'daily_budget': new_budget})
+                    if obj_type == 'campaign':
+                        obj = Campaign(obj_id)
+                    else:
+                        obj = AdSet(obj_id)
+                    
+                    obj.api_update(params={'daily_budget': new_budget})
                 print(f"  ✅ Updated {obj_type} '{name}': ${current_budget/100:.2f} → ${new_budget/100:.2f}")
                 update_info['success'] = True
             except Exception as e:
                 print(f"  ❌ Failed to update {obj_type} '{name}': {str(e)}")
                 update_info['error'] = str(e)
         
+        # Checkpoint per object so an interrupted run resumes with the rest
+        self.store.record_changes([update_info], self.run_mode)
+        
         return update_info
-    
+
+    def send_budget_update(self, obj_id, new_budget, throttle, max_retries=3):
+        """POST a daily_budget change and feed the response usage headers to the throttle"""
+        api = FacebookAdsApi.get_default_api()
+        attempts = 0
+        
+        while True:
+            throttle.wait_if_paused()
+            try:
+                response = api.call('POST', (obj_id,), params={'daily_budget': new_budget})
+            except FacebookRequestError as e:
+                if is_rate_limit_error(e) and attempts < max_retries:
+                    attempts += 1
+                    throttle.backoff(e)
+                    continue
+                raise
+            
+            throttle.observe(response.headers())
+            return response
+
+    def make_change(self, item, new_budget):
+        """Build a pending budget change for a fetched campaign or ad set"""
+        return {
+            'id': item['id'],
+            'name': item['name'],
+            'type': item['type'],
+            'current_budget': item['current_budget'],
+            'new_budget': new_budget
+        }
+
+    def apply_budget_changes(self, changes):
+        """
+        Apply pending budget changes
+
+        Uses the concurrent executor when concurrent_updates is enabled,
+        otherwise Graph API batches unless batch_updates is disabled.
+        """
+        if not changes:
+            return []
+
+        concurrency = self.config.get('concurrent_updates', {})
+        if concurrency.get('enabled', False):
+            executor = ConcurrentBudgetExecutor(self, concurrency.get('max_workers', 8))
+            return executor.run(changes)
+
+        if self.config.get('batch_updates', True):
+            return self.update_budgets_batch(changes)
+
+        return [
+            self.update_single_budget(
+                change['id'],
+                change['name'],
+                change['current_budget'],
+                change['new_budget'],
+                change['type']
+            )
+            for change in changes
+        ]
+
+    def update_budgets_batch(self, changes, max_retries=3):
+        """
+        Update budgets through Graph API batch requests (up to 50 per call)
+
+        Returns one update_info per change, in the same order as changes,
+        with per-item errors recorded just like update_single_budget.
+
+        Usage headers of every item response go through an AdaptiveThrottle;
+        rate-limited items (and whole rate-limited batches) are resent up to
+        max_retries times, each after the pause the headers ask for.
+        """
+        if self.config.get('dry_run', True):
+            return [
+                self.update_single_budget(
+                    change['id'],
+                    change['name'],
+                    change['current_budget'],
+                    change['new_budget'],
+                    change['type']
+                )
+                for change in changes
+            ]
+
+        results = [{
+            'id': change['id'],
+            'name': change['name'],
+            'type': change['type'],
+            'old_budget': change['current_budget'] / 100,
+            'new_budget': change['new_budget'] / 100,
+            'target': change['new_budget'],
+            'success': False
+        } for change in changes]
+
+        api = FacebookAdsApi.get_default_api()
+        # One batch in flight: the throttle only paces it from the usage headers
+        throttle = AdaptiveThrottle(1)
+
+        for start in range(0, len(changes), BATCH_SIZE):
+            chunk = range(start, min(start + BATCH_SIZE, len(changes)))
+            remaining = list(chunk)
+            attempts = 0
+            batch_error = None
+
+            # Throttled and unprocessed items are resent once the throttle's pause is over
+            while remaining and attempts <= max_retries:
+                throttle.wait_if_paused()
+                if attempts:
+                    print(f"  🔁 Retrying {len(remaining)} throttled or unprocessed update(s)...")
+                else:
+                    print(f"  📦 Sending batch of {len(remaining)} budget update(s)...")
+                attempts += 1
+
+                batch = api.new_batch()
+                for index in remaining:
+                    change = changes[index]
+                    if change['type'] == 'campaign':
+                        obj = Campaign(change['id'])
+                    else:
+                        obj = AdSet(change['id'])
+
+                    obj.api_update(
+                        params={'daily_budget': change['new_budget']},
+                        batch=batch,
+                        success=self._batch_success(change, results[index], throttle),
+                        failure=self._batch_failure(change, results[index], throttle)
+                    )
+
+                try:
+                    batch.execute()
+                except FacebookRequestError as e:
+                    if is_rate_limit_error(e):
+                        throttle.backoff(e)
+                        batch_error = e.api_error_message() or str(e)
+                        continue
+                    self._fail_unfinished(changes, results, remaining, str(e))
+                    break
+                except Exception as e:
+                    self._fail_unfinished(changes, results, remaining, str(e))
+                    break
+
+                remaining = [index for index in remaining
+                             if not results[index]['success'] and 'error' not in results[index]]
+
+            self._fail_unfinished(changes, results, remaining, batch_error)
+
+            # Checkpoint each batch so an interrupted run resumes with the rest
+            self.store.record_changes([results[index] for index in chunk], self.run_mode)
+
+        return results
+
+    def _fail_unfinished(self, changes, results, indices, error):
+        """Record an error on every listed update that neither succeeded nor failed yet"""
+        for index in indices:
+            update_info = results[index]
+            throttled = update_info.pop('throttled', None)
+            if update_info['success'] or 'error' in update_info:
+                continue
+            message = throttled or error or 'Request was not processed by the batch API'
+            print(f"  ❌ Failed to update {changes[index]['type']} '{changes[index]['name']}': {message}")
+            update_info['error'] = message
+
+    def _batch_success(self, change, update_info, throttle):
+        """Callback marking a batched update as successful"""
+        def callback(response):
+            throttle.observe(response.headers())
+            update_info.pop('throttled', None)
+            print(f"  ✅ Updated {change['type']} '{change['name']}': ${change['current_budget']/100:.2f} → ${change['new_budget']/100:.2f}")
+            update_info['success'] = True
+        return callback
+
+    def _batch_failure(self, change, update_info, throttle):
+        """Callback recording the per-item error of a batched update (throttled items are retried)"""
+        def callback(response):
+            error = response.error()
+            message = error.api_error_message() or str(error)
+            if is_rate_limit_error(error):
+                throttle.backoff(error)
+                update_info['throttled'] = message
+                return
+            print(f"  ❌ Failed to update {change['type']} '{change['name']}': {message}")
+            update_info['error'] = message
+        return callback
+
     def run(self):
         """Main execution - check time and update budgets accordingly"""
         print("=" * 80)
         print("🕐 Facebook Budget Scheduler V2 Running...")
         print("=" * 80)
         
-        mode, current_time = self.get_current_budget_mode()
+        now = datetime.now(self.timezone)
+        mode = self.schedule.mode_at(now)
+        key = self.schedule.key_at(now)
+        current_time = now.strftime("%H:%M")
         
-        print(f"\n📅 Current Time: {current_time} ({self.config['timezone']})")
+        print(f"\n🏢 Account: {self.account_name} ({self.ad_account_id})")
+        print(f"📅 Current Time: {current_time} ({self.config['timezone']})")
         print(f"🌙☀️  Current Mode: {mode.upper()}")
         
         if self.config.get('dry_run', True):
@@ -299,25 +484,24 @@ class BudgetScheduler:
         
         print("\n" + "-" * 80)
         
-        # Check if we need to make changes based on mode
-        if mode == 'nightly':
-            if self.state.get('last_mode') != 'nightly':
+        # Only act when the scheduled targets changed since the last run
+        if self.state.get('last_mode') != key:
+            if key == 'nightly':
                 updates = self.apply_nightly_budgets()
-                self.state['last_mode'] = 'nightly'
-                self.state['last_run'] = datetime.now(self.timezone).isoformat()
-                self.save_state()
-            else:
-                print("\n✅ Already in nightly mode, no changes needed")
-                updates = []
-        else:  # daytime
-            if self.state.get('last_mode') != 'daytime':
+            elif key == 'daytime':
                 updates = self.apply_daytime_budgets()
-                self.state['last_mode'] = 'daytime'
-                self.state['last_run'] = datetime.now(self.timezone).isoformat()
-                self.save_state()
             else:
-                print("\n✅ Already in daytime mode, no changes needed")
-                updates = []
+                updates = self.apply_scheduled_budgets(now, key)
+            self.store.set_mode(key, datetime.now(self.timezone).isoformat())
+            self.save_state()
+        else:
+            print(f"\n✅ Already in {mode} mode, no changes needed")
+            pending = self.state.get('pending_run')
+            if pending:
+                # An interrupted run of another window must not be resumed later
+                print(f"🧹 Discarding unfinished {pending['mode']} run started {pending['started']}")
+                self.store.clear_pending_run()
+            updates = []
         
         print("\n" + "=" * 80)
         print(f"✅ Scheduler completed: {len(updates)} budget(s) processed")
@@ -327,10 +511,44 @@ class BudgetScheduler:
         
         return updates
 
+def run_all_accounts(config_path='config.json'):
+    """Run the scheduler for every configured account in parallel and print a combined summary"""
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    
+    accounts = get_accounts(config)
+    results = run_per_account(
+        accounts,
+        lambda account: BudgetScheduler(config_path, account=account).run(),
+        max_workers=config.get('account_workers', 4)
+    )
+    
+    print("\n" + "=" * 80)
+    print(f"📋 Combined summary ({len(accounts)} accounts)")
+    print("=" * 80)
+    
+    total = failed = 0
+    for account, updates, error in results:
+        name = account.get('name', account['id'])
+        if error:
+            print(f"  ❌ {name} ({account['id']}): {str(error)}")
+            failed += 1
+            continue
+        succeeded = sum(1 for update in updates if update.get('success'))
+        total += len(updates)
+        print(f"  ✅ {name} ({account['id']}): {len(updates)} budget(s) processed, {len(updates) - succeeded} failed")
+    
+    print(f"\n  Total: {total} budget(s) processed across {len(accounts) - failed} account(s)")
+    print("=" * 80)
+    
+    if failed:
+        raise Exception(f"{failed} account(s) failed")
+    
+    return results
+
 def main():
     try:
-        scheduler = BudgetScheduler()
-        scheduler.run()
+        run_all_accounts()
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         import traceback
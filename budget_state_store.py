@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Budget state stores - where the scheduler keeps original budgets and run history
+
+Backends (config.json "state_backend"):
+    json     - the whole state in budget_state.json, rewritten atomically on save
+    journal  - budget_state.json snapshot plus an append-only budget_state.journal
+               (default). Every stored original, applied change and mode switch
+               is one fsynced line, so a crash mid-run loses nothing and nothing
+               has to be rewritten until the run finishes. Saving the snapshot at
+               the end of a run empties the journal again.
+
+Both keep the familiar dict in .state:
+    {'original_budgets': {id: cents}, 'applied_budgets': {id: cents},
+     'last_run': iso, 'last_mode': mode}
+
+applied_budgets is the last budget the scheduler itself wrote to each object,
+so a budget it finds there later can be told apart from an operator's edit.
+
+While a nightly/daytime switch is in progress .state also holds 'pending_run':
+the fetched object list and the ids already updated, so an interrupted run
+can resume with only the remaining objects.
+"""
+
+import os
+import json
+import tempfile
+import threading
+from datetime import datetime
+
+
+def empty_state():
+    return {
+        'original_budgets': {},
+        'applied_budgets': {},
+        'last_run': None,
+        'last_mode': None
+    }
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file in the same directory, then rename over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class JsonStateStore:
+    """Whole-file JSON state (the original budget_state.json format)"""
+
+    def __init__(self, path='budget_state.json'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = empty_state()
+
+        for key, value in empty_state().items():
+            state.setdefault(key, value)
+        return state
+
+    def get_original(self, obj_id):
+        return self.state['original_budgets'].get(obj_id)
+
+    def set_original(self, obj_id, budget):
+        self.state['original_budgets'][obj_id] = budget
+
+    def get_applied(self, obj_id):
+        """Last budget (cents) the scheduler wrote to this object, if any"""
+        return self.state['applied_budgets'].get(obj_id)
+
+    def start_run(self, mode, objects):
+        """Checkpoint the object list of a new nightly/daytime switch"""
+        self.state['pending_run'] = {
+            'mode': mode,
+            'started': datetime.now().isoformat(),
+            'objects': objects,
+            'done': []
+        }
+        self.save()
+
+    def get_pending_run(self, mode):
+        """The unfinished run for this mode, if any"""
+        pending = self.state.get('pending_run')
+        if pending and pending['mode'] == mode:
+            return pending
+        return None
+
+    def clear_pending_run(self):
+        """Drop an unfinished run that should not be resumed"""
+        self.state.pop('pending_run', None)
+        self.save()
+
+    def record_changes(self, updates, mode):
+        """Mark successful updates as done (the JSON backend keeps no change history)"""
+        with self.lock:
+            applied = self._record_applied(self.state, updates)
+            if self._mark_done(self.state, updates, mode) or applied:
+                self.save()
+
+    def _record_applied(self, state, updates):
+        """Remember the budget written by every successful, non-dry-run update"""
+        recorded = False
+        for update in updates:
+            if update.get('success') and not update.get('dry_run') and update.get('target') is not None:
+                state['applied_budgets'][update['id']] = update['target']
+                recorded = True
+        return recorded
+
+    def _mark_done(self, state, updates, mode):
+        pending = state.get('pending_run')
+        if not pending or pending['mode'] != mode:
+            return False
+        done = set(pending['done'])
+        for update in updates:
+            if update.get('success') and update['id'] not in done:
+                pending['done'].append(update['id'])
+                done.add(update['id'])
+        return True
+
+    def set_mode(self, mode, last_run):
+        self.state['last_mode'] = mode
+        self.state['last_run'] = last_run
+        self.state.pop('pending_run', None)
+
+    def checkpoint(self):
+        """Make everything recorded so far durable"""
+        self.save()
+
+    def save(self):
+        write_json_atomic(self.path, self._snapshot())
+
+    def _snapshot(self):
+        return self.state
+
+
+class JournalStateStore(JsonStateStore):
+    """budget_state.json snapshot + append-only JSON-lines journal"""
+
+    def __init__(self, path='budget_state.json', journal_path=None):
+        self.journal_path = journal_path or os.path.splitext(path)[0] + '.journal'
+        super().__init__(path)
+
+    def load(self):
+        state = super().load()
+        offset = state.pop('journal_offset', 0)
+
+        if not os.path.exists(self.journal_path):
+            return state
+
+        good_offset = offset
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    event = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash - everything before it is intact
+                    break
+                self._apply(state, event)
+                good_offset += len(line)
+
+        # Drop a torn tail so the next append starts on a clean line
+        if good_offset < os.path.getsize(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_offset)
+
+        return state
+
+    def _apply(self, state, event):
+        """Fold one journal event into the in-memory state"""
+        if event['event'] == 'original':
+            state['original_budgets'][event['id']] = event['budget']
+        elif event['event'] == 'run_start':
+            state['pending_run'] = {
+                'mode': event['mode'],
+                'started': event['ts'],
+                'objects': event['objects'],
+                'done': []
+            }
+        elif event['event'] == 'run_clear':
+            state.pop('pending_run', None)
+        elif event['event'] == 'change':
+            self._record_applied(state, [event])
+            self._mark_done(state, [event], event['mode'])
+        elif event['event'] == 'mode':
+            state['last_mode'] = event['mode']
+            state['last_run'] = event['last_run']
+            state.pop('pending_run', None)
+
+    def append(self, *events):
+        """Append events and fsync them before returning (safe from worker threads)"""
+        events = [{'ts': datetime.now().isoformat(), **event} for event in events]
+        with self.lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for event in events:
+                self._apply(self.state, event)
+
+    def set_original(self, obj_id, budget):
+        self.append({'event': 'original', 'id': obj_id, 'budget': budget})
+
+    def start_run(self, mode, objects):
+        self.append({'event': 'run_start', 'mode': mode, 'objects': objects})
+
+    def clear_pending_run(self):
+        self.append({'event': 'run_clear'})
+
+    def record_changes(self, updates, mode):
+        """Journal every attempted budget change with its outcome"""
+        if updates:
+            self.append(*[{'event': 'change', 'mode': mode, **update} for update in updates])
+
+    def set_mode(self, mode, last_run):
+        self.append({'event': 'mode', 'mode': mode, 'last_run': last_run})
+
+    def checkpoint(self):
+        """Journal writes are already durable"""
+        pass
+
+    def iter_changes(self):
+        """Yield every budget change journaled since the last snapshot, oldest first"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                if event['event'] == 'change':
+                    yield event
+
+    def save(self):
+        """
+        Write the snapshot atomically, then compact the journal into it
+
+        The snapshot is written with journal_offset 0 before the journal is
+        truncated: a crash in between replays the whole journal over a
+        snapshot that already contains it, which ends in the same state.
+        """
+        with self.lock:
+            write_json_atomic(self.path, {**self.state, 'journal_offset': 0})
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(0)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+
+STATE_BACKENDS = {
+    'json': JsonStateStore,
+    'journal': JournalStateStore,
+}
+
+
+def create_state_store(backend='journal', path='budget_state.json'):
+    """Build the state store named by config.json's state_backend"""
+    if backend not in STATE_BACKENDS:
+        raise Exception(f"Unknown state_backend '{backend}' (expected one of: {', '.join(STATE_BACKENDS)})")
+    return STATE_BACKENDS[backend](path)
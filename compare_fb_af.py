@@ -2,60 +2,81 @@
 """
 Compare Facebook Ads data vs AppsFlyer attribution data
 Identifies discrepancies in installs, events, and performance
+
+Totals are queried from the local analytics store (analytics_store.py); new or
+changed CSVs in the data directory are ingested first.
 """
 
 import os
-import csv
 from datetime import datetime, timedelta
-import pandas as pd
+from analytics_store import AnalyticsStore
+
+# Flattened FB columns for the compared events (see download_fb_data.FLATTENED_FIELDS)
+FB_INSTALL_COLUMN = 'action_mobile_app_install'
+
+FB_TABLE = 'fb_ad_overview'
+AF_TABLE = 'appsflyer_fb'
 
 class FBAppsFlyerComparison:
-    def __init__(self):
-        pass
+    def __init__(self, data_dir='data'):
+        self.data_dir = data_dir
+        self.store = AnalyticsStore(os.path.join(data_dir, 'analytics.db'))
+    
+    def report_date(self, date_str):
+        """YYYYMMDD -> the store's ISO report_date"""
+        return f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
     
     def load_fb_data(self, date_str):
-        """Load Facebook ad data for a specific date"""
-        filepath = f"data/ad_overview_{date_str}.csv"
+        """Check Facebook ad data is loaded for a specific date, returns its row count"""
+        rows = self.store.report_rows(FB_TABLE, self.report_date(date_str))
         
-        if not os.path.exists(filepath):
-            print(f"⚠️  Facebook data not found: {filepath}")
+        if rows is None:
+            print(f"⚠️  Facebook data not found: {self.data_dir}/ad_overview_{date_str}.csv")
             return None
         
-        df = pd.read_csv(filepath)
-        print(f"✅ Loaded Facebook data: {len(df)} ads")
-        return df
+        print(f"✅ Loaded Facebook data: {rows} ads")
+        return rows
     
     def load_appsflyer_data(self, date_str):
-        """Load AppsFlyer data for a specific date"""
-        filepath = f"data/appsflyer_fb_{date_str}.csv"
+        """Check AppsFlyer data is loaded for a specific date, returns its row count"""
+        rows = self.store.report_rows(AF_TABLE, self.report_date(date_str))
         
-        if not os.path.exists(filepath):
-            print(f"⚠️  AppsFlyer data not found: {filepath}")
+        if rows is None:
+            print(f"⚠️  AppsFlyer data not found: {self.data_dir}/appsflyer_fb_{date_str}.csv")
             return None
         
-        df = pd.read_csv(filepath)
-        print(f"✅ Loaded AppsFlyer data: {len(df)} rows")
-        return df
+        print(f"✅ Loaded AppsFlyer data: {rows} rows")
+        return rows
+    
+    def column_total(self, table, date_str, column, matches):
+        """
+        Sum of a metric column for one date: the named column when the table has
+        it, otherwise the first column accepted by matches(col)
+        """
+        columns = self.store.column_names(table)
+        if column is None or column not in columns:
+            candidates = [col for col in columns if matches(col)]
+            if not candidates:
+                return 0
+            column = candidates[0]
+        
+        return float(self.store.column_sum(table, self.report_date(date_str), column))
     
-    def compare_installs(self, fb_df, af_df, date_str):
+    def compare_installs(self, date_str):
         """Compare install counts between Facebook and AppsFlyer"""
         print("\n" + "=" * 80)
         print(f"📊 INSTALL COMPARISON - {date_str}")
         print("=" * 80)
         
         # Get total installs from FB
-        fb_installs_col = [col for col in fb_df.columns if 'mobile_app_install' in col.lower()]
-        if fb_installs_col:
-            fb_total_installs = fb_df[fb_installs_col[0]].astype(float).sum()
-        else:
-            fb_total_installs = 0
+        fb_total_installs = self.column_total(
+            FB_TABLE, date_str, FB_INSTALL_COLUMN, lambda col: 'mobile_app_install' in col.lower()
+        )
         
         # Get total installs from AF
-        af_installs_col = [col for col in af_df.columns if 'install' in col.lower()]
-        if af_installs_col:
-            af_total_installs = af_df[af_installs_col[0]].astype(float).sum()
-        else:
-            af_total_installs = 0
+        af_total_installs = self.column_total(
+            AF_TABLE, date_str, None, lambda col: 'install' in col.lower()
+        )
         
         print(f"\n📱 Total Installs:")
         print(f"  Facebook reports: {int(fb_total_installs)}")
@@ -77,25 +98,22 @@ class FBAppsFlyerComparison:
             'discrepancy_pct': discrepancy if fb_total_installs > 0 else None
         }
     
-    def compare_events(self, fb_df, af_df, date_str, event_name='start_trial'):
+    def compare_events(self, date_str, event_name='start_trial'):
         """Compare event counts (e.g., trials) between Facebook and AppsFlyer"""
         print("\n" + "=" * 80)
         print(f"🎯 {event_name.upper()} COMPARISON - {date_str}")
         print("=" * 80)
         
         # Get event count from FB
-        fb_event_col = [col for col in fb_df.columns if event_name.lower() in col.lower() and 'action_' in col]
-        if fb_event_col:
-            fb_events = fb_df[fb_event_col[0]].astype(float).sum()
-        else:
-            fb_events = 0
+        fb_events = self.column_total(
+            FB_TABLE, date_str, f'action_{event_name}',
+            lambda col: event_name.lower() in col.lower() and 'action_' in col
+        )
         
         # Get event count from AF
-        af_event_col = [col for col in af_df.columns if event_name.lower().replace('_', '') in col.lower()]
-        if af_event_col:
-            af_events = af_df[af_event_col[0]].astype(float).sum()
-        else:
-            af_events = 0
+        af_events = self.column_total(
+            AF_TABLE, date_str, None, lambda col: event_name.lower().replace('_', '') in col.lower()
+        )
         
         print(f"\n🎯 Total {event_name}:")
         print(f"  Facebook reports: {int(fb_events)}")
@@ -117,29 +135,30 @@ class FBAppsFlyerComparison:
         print(f"🔍 COMPARING FACEBOOK vs APPSFLYER - {date_str}")
         print("=" * 80)
         
-        # Load both datasets
-        fb_df = self.load_fb_data(date_str)
-        af_df = self.load_appsflyer_data(date_str)
+        # Load new / changed files, then check both datasets are there
+        self.store.ingest(self.data_dir)
+        fb_rows = self.load_fb_data(date_str)
+        af_rows = self.load_appsflyer_data(date_str)
         
-        if fb_df is None or af_df is None:
+        if fb_rows is None or af_rows is None:
             print("❌ Cannot compare - missing data")
             return None
         
         # Compare installs
-        install_comparison = self.compare_installs(fb_df, af_df, date_str)
+        install_comparison = self.compare_installs(date_str)
         
         # Compare trials
-        trial_comparison = self.compare_events(fb_df, af_df, date_str, 'start_trial')
+        trial_comparison = self.compare_events(date_str, 'start_trial')
         
         # Save comparison report
-        self.save_comparison_report(date_str, install_comparison, trial_comparison, fb_df, af_df)
+        self.save_comparison_report(date_str, install_comparison, trial_comparison)
         
         return {
             'installs': install_comparison,
             'trials': trial_comparison
         }
     
-    def save_comparison_report(self, date_str, install_comp, trial_comp, fb_df, af_df):
+    def save_comparison_report(self, date_str, install_comp, trial_comp):
         """Save comparison report as text file"""
         output_dir = 'comparisons'
         os.makedirs(output_dir, exist_ok=True)
@@ -180,7 +199,10 @@ def main():
         yesterday = datetime.now().date() - timedelta(days=1)
         date_str = yesterday.strftime('%Y%m%d')
         
-        result = comparator.compare_daily(date_str)
+        try:
+            result = comparator.compare_daily(date_str)
+        finally:
+            comparator.store.close()
         
     except Exception as e:
         print(f"❌ Error: {str(e)}")
@@ -9,6 +9,7 @@ import csv
 from datetime import datetime, timedelta
 import requests
 from dotenv import load_dotenv
+from parquet_store import write_csv_partition
 
 load_dotenv()
 
@@ -103,6 +104,15 @@ class AppsFlyerDataDownloader:
             writer.writerows(data)
         
         print(f"✅ Saved to {filepath} ({len(data)} rows)")
+        
+        # Typed Parquet copy for fast columnar loads (needs pyarrow)
+        try:
+            parquet_path = write_csv_partition(filepath)
+            if parquet_path:
+                print(f"🧱 Parquet copy: {parquet_path}")
+        except Exception as e:
+            print(f"  ⚠️  Could not write Parquet copy of {filepath}: {str(e)}")
+        
         return filepath
     
     def download_daily_report(self, days_ago=1):
@@ -1,44 +1,78 @@
 #!/usr/bin/env python3
 """
-Download Facebook Ads data for the past 7 days
+Download Facebook Ads data for the past 7 days (or any date range)
+
+Usage:
+    python download_weekly_data.py                                  # last 7 days
+    python download_weekly_data.py --days 90                        # last 90 days
+    python download_weekly_data.py --since 2025-11-01 --until 2025-11-30
+    python download_weekly_data.py --days 30 --async                # force async report runs
 """
 
-from download_fb_data import FacebookDataDownloader
+import argparse
+from download_fb_data import FacebookDataDownloader, load_accounts
+from accounts import data_dir_for, run_per_account
 from datetime import datetime, timedelta
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backfill daily Facebook Ads report files")
+    parser.add_argument('--days', type=int, default=7,
+                        help="number of days before today to download (default: 7)")
+    parser.add_argument('--since', help="first date to download, YYYY-MM-DD")
+    parser.add_argument('--until', help="last date to download, YYYY-MM-DD (default: yesterday)")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="use async report runs even for short ranges")
+    return parser.parse_args()
+
 def main():
-    print("=" * 80)
-    print("📊 DOWNLOADING LAST 7 DAYS OF FACEBOOK ADS DATA")
-    print("=" * 80)
-    
+    args = parse_args()
+
     try:
-        downloader = FacebookDataDownloader()
-        
-        all_reports = {}
-        
-        # Download data for each of the past 7 days
-        for days_ago in range(1, 8):  # 1 to 7 days ago
-            date = (datetime.now().date() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
-            
-            print(f"\n{'='*80}")
-            print(f"Downloading data for {date} ({days_ago} days ago)")
-            print(f"{'='*80}")
-            
-            reports = downloader.download_daily_report(days_ago=days_ago)
-            all_reports[date] = reports
-        
+        config, accounts = load_accounts()
+
+        # Every configured account, each into its own data directory
+        def download_account(account):
+            downloader = FacebookDataDownloader(
+                use_async=args.use_async,
+                ad_account_id=account['id'],
+                data_dir=data_dir_for(config, account['id'])
+            )
+
+            yesterday = datetime.now(downloader.timezone).date() - timedelta(days=1)
+            until = args.until or yesterday.strftime('%Y-%m-%d')
+            since = args.since or (yesterday - timedelta(days=args.days - 1)).strftime('%Y-%m-%d')
+
+            print("=" * 80)
+            print(f"📊 DOWNLOADING FACEBOOK ADS DATA ({account.get('name', account['id'])}): {since} → {until}")
+            print("=" * 80)
+
+            # One time_increment=1 query per breakdown, split into daily files
+            return downloader.download_date_range(since, until)
+
+        results = run_per_account(accounts, download_account, max_workers=config.get('account_workers', 4))
+
         print("\n\n" + "=" * 80)
-        print("✅ 7-DAY DOWNLOAD COMPLETE")
+        print("✅ DOWNLOAD COMPLETE")
         print("=" * 80)
-        
-        for date, reports in all_reports.items():
-            print(f"\n{date}: {len(reports)} files")
-            for report_type, filepath in reports.items():
-                if filepath:
-                    print(f"  - {report_type}")
-        
+
+        failed = 0
+        for account, all_reports, error in results:
+            print(f"\n🏢 {account.get('name', account['id'])} ({account['id']})")
+            if error:
+                print(f"  ❌ {str(error)}")
+                failed += 1
+                continue
+            for date, reports in all_reports.items():
+                print(f"\n{date}: {len(reports)} files")
+                for report_type, filepath in reports.items():
+                    if filepath:
+                        print(f"  - {report_type}")
+
         print("=" * 80)
-        
+
+        if failed:
+            raise Exception(f"{failed} account(s) failed")
+
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
         import traceback
@@ -47,4 +81,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
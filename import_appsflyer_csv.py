@@ -8,6 +8,7 @@ import os
 import sys
 import shutil
 from datetime import datetime, timedelta
+from parquet_store import write_csv_partition
 
 def import_appsflyer_csv(source_file, date_str=None):
     """
@@ -47,6 +48,14 @@ def import_appsflyer_csv(source_file, date_str=None):
     shutil.copy2(source_file, target_file)
     print(f"✅ Imported: {target_file}")
     
+    # Refresh the typed Parquet copy (needs pyarrow)
+    try:
+        parquet_path = write_csv_partition(target_file, overwrite=True)
+        if parquet_path:
+            print(f"🧱 Parquet copy: {parquet_path}")
+    except Exception as e:
+        print(f"⚠️  Could not write Parquet copy: {str(e)}")
+    
     return True
 
 def print_usage():
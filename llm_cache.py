@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+LLM response cache - reuse an analysis when the exact same request is repeated
+
+Entries are content-addressed: the key is a SHA-256 of the model, its
+settings (reasoning effort, verbosity, max tokens, ...) and the full prompt,
+which embeds the analysis template and the data. Rerunning an analysis for the
+same date over unchanged data (a workflow retry, a manual dispatch) returns
+the stored response instead of calling the API; any change to the template,
+data, model or settings is a different key.
+
+Entries live in analyses/cache/<key>.json. Entries older than ttl_days are
+dropped, and once the cache holds more than max_entries or max_mb the least
+recently used entries are evicted.
+
+Usage:
+    python llm_cache.py stats     # entries, size, oldest/newest
+    python llm_cache.py clear     # delete every entry
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import hashlib
+import threading
+from datetime import datetime
+
+CACHE_DIR = os.path.join('analyses', 'cache')
+
+# put() evicts other entries; map-reduce analyses store responses from several threads
+_lock = threading.Lock()
+
+
+def remove_entry(path):
+    """Delete a cache file; another thread or process may already have removed it"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl_days=30, max_entries=200, max_mb=50):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.max_bytes = max_mb * 1024 * 1024
+
+    @staticmethod
+    def key(model, settings, prompt):
+        """Content address of one request"""
+        payload = json.dumps({'model': model, 'settings': settings, 'prompt': prompt}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Cached response text, or None if missing or expired"""
+        path = self.path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > self.ttl_seconds:
+                remove_entry(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # mtime doubles as "last used" for LRU eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return entry['response']
+
+    def put(self, key, response, **meta):
+        """Store a response (meta: model, date, ... kept for inspection)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+        with _lock:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'created': datetime.now().isoformat(), **meta, 'response': response}, f)
+            os.replace(tmp_path, path)
+            self.evict()
+
+    def entries(self):
+        """(mtime, size, path) of every entry, least recently used first"""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.json')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        """Drop expired entries, then the least recently used until within the limits"""
+        now = time.time()
+        entries = []
+        for mtime, size, path in self.entries():
+            if now - mtime > self.ttl_seconds:
+                remove_entry(path)
+            else:
+                entries.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            remove_entry(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        entries = self.entries()
+        for _, _, path in entries:
+            remove_entry(path)
+        return len(entries)
+
+
+class CachedAnalysisMixin:
+    """
+    Response cache and streaming shared by the analyzers
+
+    The analyzer class sets model, request_settings, api_name (error messages),
+    model_label (progress lines) and analysis_title, creates self.cache and
+    implements request_analysis() and stream_analysis().
+    """
+
+    def cache_key(self, message_content):
+        """Response cache key for one prompt with this model and its settings"""
+        return self.cache.key(self.model, self.request_settings, message_content)
+
+    def cached_analysis(self, message_content, force=False, stream_to=None, **meta):
+        """
+        request_analysis() through the response cache
+
+        On a miss, stream_to(message_content) produces the response instead of
+        request_analysis() when given; a None result (failed stream) is not cached.
+
+        Returns:
+            (analysis, cached) - cached is True if no request was made
+        """
+        cache_key = self.cache_key(message_content)
+        analysis = None if force else self.cache.get(cache_key)
+        if analysis is not None:
+            return analysis, True
+
+        if stream_to is not None:
+            analysis = stream_to(message_content)
+        else:
+            analysis = self.request_analysis(message_content)
+        if analysis is not None:
+            self.cache.put(cache_key, analysis, model=self.model, **meta)
+        return analysis, False
+
+    def stream_to_file(self, message_content, output_file, header):
+        """
+        Print the streamed analysis and write it to output_file as it arrives
+
+        If the stream fails, the text received so far stays in output_file
+        followed by an interruption marker, and None is returned.
+        """
+        print("\n" + "=" * 80)
+        print(f"📊 {self.analysis_title}")
+        print("=" * 80)
+
+        chunks = []
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(header)
+            try:
+                for text in self.stream_analysis(message_content):
+                    chunks.append(text)
+                    f.write(text)
+                    f.flush()
+                    print(text, end='', flush=True)
+            except Exception as e:
+                received = sum(len(chunk) for chunk in chunks)
+                marker = f"\n\n[STREAM INTERRUPTED after {received} characters: {str(e)}]\n"
+                f.write(marker)
+                print(marker)
+                print(f"❌ Stream failed, partial analysis kept in: {output_file}")
+                return None
+
+        print("\n" + "=" * 80)
+        return "".join(chunks)
+
+    def deliver_analysis(self, message_content, output_file, header, force=False, stream=False, **meta):
+        """
+        Get the analysis for a prompt (cached, streamed or requested), print it
+        and save it to output_file after header; returns None on failure
+        """
+        def stream_to(content):
+            print(f"\n🔄 Streaming from {self.model_label}...")
+            return self.stream_to_file(content, output_file, header)
+
+        try:
+            if not stream:
+                print(f"\n🔄 Analyzing with {self.model_label}...")
+            analysis, cached = self.cached_analysis(
+                message_content, force=force, stream_to=stream_to if stream else None, **meta
+            )
+            if analysis is None:
+                return None
+
+            if stream and not cached:
+                # Already printed and written to output_file as it arrived
+                print(f"\n💾 Analysis saved to: {output_file}")
+                return analysis
+
+            if cached:
+                print("⚡ Using cached analysis (unchanged prompt and data, --force to rerun)")
+            else:
+                print("✅ Analysis received!")
+
+            print("\n" + "=" * 80)
+            print(f"📊 {self.analysis_title}")
+            print("=" * 80)
+            print(analysis)
+            print("=" * 80)
+
+            # Save analysis to file
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(header)
+                f.write(analysis)
+
+            print(f"\n💾 Analysis saved to: {output_file}")
+
+            return analysis
+
+        except Exception as e:
+            print(f"❌ Error calling {self.api_name} API: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('stats', 'clear'):
+        print(__doc__)
+        return
+
+    cache = ResponseCache()
+    if sys.argv[1] == 'clear':
+        print(f"🗑️  Removed {cache.clear()} cached response(s) from {cache.cache_dir}")
+        return
+
+    entries = cache.entries()
+    if not entries:
+        print(f"📭 No cached responses in {cache.cache_dir}")
+        return
+    total_mb = sum(size for _, size, _ in entries) / 1024 / 1024
+    print(f"📦 {len(entries)} cached response(s), {total_mb:.2f} MB in {cache.cache_dir}")
+    print(f"  Least recently used: {datetime.fromtimestamp(entries[0][0]).isoformat(timespec='seconds')}")
+    print(f"  Most recently used:  {datetime.fromtimestamp(entries[-1][0]).isoformat(timespec='seconds')}")
+
+
+if __name__ == "__main__":
+    main()
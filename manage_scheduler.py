@@ -9,6 +9,10 @@ import os
 from dotenv import load_dotenv
 from facebook_business.api import FacebookAdsApi
 from facebook_business.adobjects.adaccount import AdAccount
+from account_discovery import fetch_active_adsets
+from budget_state_store import create_state_store
+from accounts import get_accounts, account_config, namespaced_path
+from budget_schedule import BudgetSchedule
 
 load_dotenv()
 
@@ -21,7 +25,8 @@ class SchedulerManager:
         access_token = os.getenv('FACEBOOK_ACCESS_TOKEN')
         if access_token:
             FacebookAdsApi.init(access_token=access_token)
-            self.account = AdAccount('act_24590952')
+            self.accounts = get_accounts(self.config)
+            self.account = AdAccount(self.accounts[0]['id'])
     
     def load_config(self):
         with open(self.config_path, 'r') as f:
@@ -40,8 +45,9 @@ class SchedulerManager:
         
         print(f"\n⏰ Schedule:")
         print(f"  Timezone: {self.config['timezone']}")
-        print(f"  Nightly Time (low budget): {self.config['schedule']['nightly_time']}")
-        print(f"  Daytime Time (high budget): {self.config['schedule']['daytime_time']}")
+        print(f"  Reduced-budget windows:")
+        for line in BudgetSchedule.from_config(self.config).describe():
+            print(f"    {line}")
         
         print(f"\n💰 Budget Settings:")
         nightly = self.config['budgets']['nightly_amount']
@@ -49,14 +55,18 @@ class SchedulerManager:
         print(f"  Nightly Amount: ${nightly/100:.2f} ({nightly} cents)")
         print(f"  Daytime Behavior: {'Restore to original budgets' if restore else 'Fixed amount'}")
         
-        # Show stored budgets if any
-        try:
-            with open('budget_state.json', 'r') as f:
-                state = json.load(f)
-                if state.get('original_budgets'):
-                    print(f"\n💾 Stored Original Budgets: {len(state['original_budgets'])} items")
-        except:
-            pass
+        # Stored budgets and last run of every account (each has its own state file)
+        print(f"\n💾 Stored Original Budgets:")
+        for account in get_accounts(self.config):
+            name = account.get('name', account['id'])
+            try:
+                config = account_config(self.config, account)
+                state_path = namespaced_path(self.config, account['id'], 'budget_state.json')
+                state = create_state_store(config.get('state_backend', 'journal'), state_path).state
+                last = f", last {state['last_mode']} run {state['last_run']}" if state.get('last_run') else ""
+                print(f"  {name} ({account['id']}): {len(state['original_budgets'])} items in {state_path}{last}")
+            except Exception as e:
+                print(f"  ⚠️  {name} ({account['id']}): could not read state ({str(e)})")
         
         print(f"\n🚫 Exclusions:")
         print(f"  Excluded Ad Sets: {len(self.config['excluded_adsets'])}")
@@ -132,22 +142,44 @@ class SchedulerManager:
         print("📊 Active Campaigns and Ad Sets")
         print("=" * 80)
         
+        for account in self.accounts:
+            print(f"\n🏢 Account: {account.get('name', account['id'])} ({account['id']})")
+            self.list_account_items(AdAccount(account['id']), account_config(self.config, account))
+        
+        print("\n" + "=" * 80 + "\n")
+    
+    def list_account_items(self, ad_account, config):
+        """List active campaigns and ad sets of one account with their exclusion status"""
         try:
-            campaigns = self.account.get_campaigns(
-                fields=['id', 'name', 'daily_budget'],
-                params={'effective_status': ['ACTIVE']}
-            )
+            # One account-level ad set query with the campaign expanded inline
+            rows = fetch_active_adsets(ad_account)
             
             print("\n🎯 Active Campaigns:")
-            for campaign in campaigns:
-                campaign_id = campaign.get('id')
-                is_excluded = campaign_id in self.config['excluded_campaigns']
+            seen_campaigns = set()
+            for row in rows:
+                campaign = row['campaign']
+                campaign_id = campaign['id']
+                if campaign_id in seen_campaigns:
+                    continue
+                seen_campaigns.add(campaign_id)
+                is_excluded = campaign_id in config['excluded_campaigns']
                 status = "❌ EXCLUDED" if is_excluded else "✅ INCLUDED"
-                budget = campaign.get('daily_budget')
+                budget = campaign['daily_budget']
                 budget_str = f"${int(budget)/100:.2f}" if budget else "No budget set"
-                print(f"  {status} - {campaign.get('name')} (ID: {campaign_id}) - Budget: {budget_str}")
+                print(f"  {status} - {campaign['name']} (ID: {campaign_id}) - Budget: {budget_str}")
             
-            print("\n" + "=" * 80 + "\n")
+            print("\n📂 Active Ad Sets (ad set budgets only):")
+            for row in rows:
+                if row['campaign']['daily_budget']:
+                    continue
+                adset = row['adset']
+                adset_id = adset.get('id')
+                is_excluded = adset_id in config['excluded_adsets'] or \
+                    row['campaign']['id'] in config['excluded_campaigns']
+                status = "❌ EXCLUDED" if is_excluded else "✅ INCLUDED"
+                budget = adset.get('daily_budget')
+                budget_str = f"${int(budget)/100:.2f}" if budget else "No budget set"
+                print(f"  {status} - {adset.get('name')} (ID: {adset_id}) - Budget: {budget_str}")
         except Exception as e:
             print(f"❌ Error fetching campaigns: {str(e)}")
 
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Map-reduce analysis - 30 / 90 day windows without overflowing the context
+
+Map: the window is split into chunks, one per day (default) or one per
+campaign, and each chunk's rollup cubes are analyzed on their own, up to
+max_workers requests at a time. Reduce: one more request merges the chunk
+findings, with the account-by-day cube of the whole window, into the final
+analysis (analysis_prompt.txt).
+
+Every request goes through the analyzer's response cache (llm_cache.py). A day
+chunk's prompt only depends on that day's data, so extending the window by a
+new day runs one new map step plus the reduce; the other days are cache hits.
+Campaign chunks cover the whole window and are only reused while it is
+unchanged.
+
+Usage:
+    python map_reduce_analysis.py [openai|claude] [days] [--by-campaign] [--force]
+        (default: openai, 30 days ending yesterday, one chunk per day)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from prompt_encoder import PromptEncoder, FORMAT_NOTE
+from report_rollups import (
+    build_cubes, encode_cubes, cube_rows, window_dates, load_report, to_metrics, by_day, ROLLUP_NOTE, DATA_DIR
+)
+
+MAP_PROMPT = """You are analyzing one slice of a longer Facebook Ads reporting window: {label}.
+Your notes will be merged with the notes for the other slices into one report, so write
+findings, not a report:
+- headline numbers: spend, installs, trials, CPI, cost per trial
+- the biggest movers and outliers (campaigns, ad sets, ads, age / gender / placement) with their numbers
+- anything anomalous: no delivery, cost spikes, missing installs or trials
+Refer to campaigns, ad sets and ads by their full names from NAMES, not by code.
+At most 15 bullet points.
+"""
+
+REDUCE_NOTE = (
+    "The window was analyzed in slices; CHUNK FINDINGS are the notes written for each slice "
+    "(analyst notes, not raw data). ACCOUNT BY DAY is the raw daily total for the whole window.\n"
+)
+
+
+def day_chunks(date_str, days, data_dir=DATA_DIR):
+    """[(label, cubes)] with one chunk per day of the window that has data"""
+    chunks = []
+    for day in window_dates(date_str, days):
+        cubes = build_cubes(day, days=1, data_dir=data_dir)
+        if cubes:
+            chunks.append((f"day {day[:4]}-{day[4:6]}-{day[6:]}", cubes))
+    return chunks
+
+
+def campaign_chunks(date_str, days, data_dir=DATA_DIR):
+    """[(label, cubes)] with one chunk per campaign, largest spend first"""
+    cubes = build_cubes(date_str, days=days, data_dir=data_dir)
+    campaign_cubes = [(title, cube, max_rows) for title, cube, max_rows in cubes if 'campaign_name' in cube.columns]
+    if not campaign_cubes:
+        return []
+
+    # Campaigns by day is the first campaign cube
+    spend = campaign_cubes[0][1].groupby('campaign_name')['spend'].sum().sort_values(ascending=False)
+    period = f"{days} days to {date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+
+    chunks = []
+    for campaign in spend.index:
+        campaign_cube = [(title, cube[cube['campaign_name'] == campaign], max_rows)
+                         for title, cube, max_rows in campaign_cubes]
+        campaign_cube = [(title, cube, max_rows) for title, cube, max_rows in campaign_cube if not cube.empty]
+        chunks.append((f"campaign {campaign}, {period}", campaign_cube))
+    return chunks
+
+
+class MapReduceAnalysis:
+    def __init__(self, analyzer, max_workers=4, data_dir=DATA_DIR):
+        """
+        Args:
+            analyzer: OpenAIAnalyzer or ClaudeAnalyzer (client, prompt and cache are reused)
+            max_workers: map requests in flight at once
+        """
+        self.analyzer = analyzer
+        self.max_workers = max_workers
+        self.data_dir = data_dir
+
+    def map_prompt(self, label, cubes):
+        encoder = PromptEncoder()
+        tables = encode_cubes(cubes, encoder)
+        return "".join([MAP_PROMPT.format(label=label), "\nDATA:\n", FORMAT_NOTE, ROLLUP_NOTE,
+                        encoder.legend(), tables])
+
+    def map_chunks(self, chunks, force=False):
+        """
+        Analyze every chunk on the worker pool
+
+        Returns a list of (label, findings) in chunk order; a failed chunk has
+        findings None and does not stop the others.
+        """
+        def run(chunk):
+            label, cubes = chunk
+            try:
+                findings, cached = self.analyzer.cached_analysis(
+                    self.map_prompt(label, cubes), force=force, chunk=label
+                )
+                print(f"  {'⚡' if cached else '✅'} {label}")
+                return label, findings
+            except Exception as e:
+                print(f"  ❌ {label}: {str(e)}")
+                return label, None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(chunks)))) as pool:
+            return list(pool.map(run, chunks))
+
+    def reduce_prompt(self, date_str, days, by, findings):
+        """Final prompt: analysis prompt, account by day for the window and the chunk findings"""
+        encoder = PromptEncoder()
+        overview = load_report('ad_overview', window_dates(date_str, days), self.data_dir)
+        account = ""
+        if overview is not None:
+            account = encoder.encode_rows('ACCOUNT BY DAY', cube_rows(by_day(to_metrics(overview), [])))
+
+        sections = []
+        for label, text in findings:
+            text = text if text is not None else "(analysis of this slice failed - no findings)"
+            sections.append(encoder.add_section(label, f"\n## {label}\n{text.strip()}\n"))
+
+        self.token_estimates = encoder.token_report()
+        return "".join([
+            self.analyzer.analysis_prompt,
+            f"\n\nDATA FOR ANALYSIS:\n# FACEBOOK ADS - LAST {days} DAYS, ANALYZED IN {len(findings)} SLICES ({by})\n",
+            REDUCE_NOTE, FORMAT_NOTE, ROLLUP_NOTE, account,
+            "\n# CHUNK FINDINGS\n", *sections,
+            "\nPlease provide your analysis in the format described above, covering the whole window: "
+            "trends across the slices, not a summary of each one.",
+        ])
+
+    def analyze(self, date_str, days=30, by='day', force=False):
+        """Map-reduce analysis of the `days` days ending on date_str (YYYYMMDD)"""
+        print("=" * 80)
+        print(f"🤖 Map-reduce analysis: {days} days to {date_str}, one chunk per {by}")
+        print("=" * 80)
+
+        print("\n📊 Building chunks...")
+        if by == 'campaign':
+            chunks = campaign_chunks(date_str, days, self.data_dir)
+        else:
+            chunks = day_chunks(date_str, days, self.data_dir)
+
+        if not chunks:
+            print("❌ No data found for analysis")
+            return None
+
+        print(f"\n🔄 Map: {len(chunks)} chunk(s), up to {self.max_workers} requests at a time...")
+        findings = self.map_chunks(chunks, force)
+        failed = sum(1 for _, text in findings if text is None)
+        if failed == len(findings):
+            print("❌ Every chunk failed, nothing to reduce")
+            return None
+        if failed:
+            print(f"⚠️  {failed} chunk(s) failed, reducing the other {len(findings) - failed}")
+
+        message_content = self.reduce_prompt(date_str, days, by, findings)
+        print("\n📏 Estimated reduce prompt tokens by section:")
+        for line in self.token_estimates:
+            print(line)
+
+        try:
+            print("\n🔄 Reduce...")
+            analysis, cached = self.analyzer.cached_analysis(
+                message_content, force=force, date=date_str, days=days
+            )
+            print(f"{'⚡ Cached' if cached else '✅'} analysis")
+            print("\n" + "=" * 80)
+            print(analysis)
+            print("=" * 80)
+
+            output_dir = 'analyses'
+            os.makedirs(output_dir, exist_ok=True)
+            output_file = os.path.join(output_dir, f'analysis_{self.analyzer.name}_{days}d_{date_str}.txt')
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(f"Facebook Ads Analysis ({days} days, per-{by} map-reduce) - {date_str}\n")
+                f.write("=" * 80 + "\n\n")
+                f.write(analysis)
+
+            print(f"\n💾 Analysis saved to: {output_file}")
+
+            return analysis
+
+        except Exception as e:
+            print(f"❌ Error in reduce step: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    provider = args[0] if args else 'openai'
+    days = int(args[1]) if len(args) > 1 else 30
+
+    try:
+        if provider == 'claude':
+            from analyze_with_claude import ClaudeAnalyzer
+            analyzer = ClaudeAnalyzer()
+        else:
+            from analyze_with_openai import OpenAIAnalyzer
+            analyzer = OpenAIAnalyzer()
+
+        yesterday = (datetime.now().date() - timedelta(days=1)).strftime('%Y%m%d')
+        MapReduceAnalysis(analyzer).analyze(
+            yesterday, days,
+            by='campaign' if '--by-campaign' in sys.argv else 'day',
+            force='--force' in sys.argv
+        )
+
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Nightly optimizer - per-object nightly budgets from hourly cost-per-install curves
+
+Instead of cutting every budget to the flat nightly_amount, each campaign
+(CBO) or ad set (ABO) gets a nightly budget scaled by how much worse its
+cost per install is during the reduced-budget hours than during the rest of
+the day, over the past lookback_days:
+
+    ratio    = night CPI / day CPI
+    fraction = clip(max_cpi_ratio / ratio, min_fraction, 1)
+    nightly  = max(original budget x fraction, min_amount)
+
+Objects that stay efficient at night keep their budget; objects with too
+few installs to judge fall back to nightly_amount.
+
+Hourly insights (hourly_stats_aggregated_by_advertiser_time_zone) are cached
+per day in data/hourly/adset_hourly_YYYYMMDD.csv (data/hourly_<account id>/
+for non-primary accounts), so only missing days are downloaded.
+
+config.json:
+    "nightly_optimizer": {
+        "enabled": false,
+        "lookback_days": 14,
+        "max_cpi_ratio": 1.2,     # night CPI allowed before budgets are cut
+        "min_fraction": 0.1,      # never cut below 10% of the original budget
+        "min_installs": 10,       # daytime installs needed to fit an object
+        "min_amount": 100,        # cents
+        "install_action": "mobile_app_install",
+        "cache_dir": "data/hourly"
+    }
+"""
+
+import os
+import pytz
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from accounts import namespaced_path
+
+HOURLY_BREAKDOWN = 'hourly_stats_aggregated_by_advertiser_time_zone'
+
+HOURLY_FIELDS = ['campaign_id', 'adset_id', 'spend', 'actions']
+
+HOURLY_COLUMNS = ['date', 'campaign_id', 'adset_id', 'hour', 'spend', 'installs']
+
+DEFAULTS = {
+    'enabled': False,
+    'lookback_days': 14,
+    'max_cpi_ratio': 1.2,
+    'min_fraction': 0.1,
+    'min_installs': 10,
+    'min_amount': 100,
+    'install_action': 'mobile_app_install',
+    'cache_dir': 'data/hourly',
+}
+
+
+def optimizer_settings(config):
+    return {**DEFAULTS, **config.get('nightly_optimizer', {})}
+
+
+class HourlyInsightsCache:
+    """Ad set x hour spend and installs per day, cached as one CSV per day"""
+
+    def __init__(self, account, cache_dir='data/hourly', install_action='mobile_app_install'):
+        self.account = account
+        self.cache_dir = cache_dir
+        self.install_action = install_action
+
+    def day_path(self, day):
+        return os.path.join(self.cache_dir, f"adset_hourly_{day.strftime('%Y%m%d')}.csv")
+
+    def load(self, since, until):
+        """Hourly rows for since..until (dates), downloading only the days not cached yet"""
+        days = [since + timedelta(days=i) for i in range((until - since).days + 1)]
+        missing = [day for day in days if not os.path.exists(self.day_path(day))]
+        if missing:
+            self.download(min(missing), max(missing))
+
+        frames = [pd.read_csv(self.day_path(day), dtype={'campaign_id': str, 'adset_id': str}) for day in days]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=HOURLY_COLUMNS)
+
+    def download(self, since, until):
+        """One time_increment=1 query for the whole range, split into daily files"""
+        print(f"  📥 Downloading hourly insights {since} → {until}...")
+        insights = self.account.get_insights(
+            fields=HOURLY_FIELDS,
+            params={
+                'level': 'adset',
+                'time_range': {'since': since.isoformat(), 'until': until.isoformat()},
+                'time_increment': 1,
+                'breakdowns': [HOURLY_BREAKDOWN],
+                'limit': 500,
+            }
+        )
+
+        rows = []
+        for insight in insights:
+            installs = sum(
+                float(action.get('value', 0)) for action in insight.get('actions') or []
+                if action.get('action_type') == self.install_action
+            )
+            rows.append({
+                'date': insight.get('date_start'),
+                'campaign_id': insight.get('campaign_id'),
+                'adset_id': insight.get('adset_id'),
+                # '00:00:00 - 00:59:59' -> 0
+                'hour': int(insight.get(HOURLY_BREAKDOWN)[:2]),
+                'spend': float(insight.get('spend') or 0),
+                'installs': installs,
+            })
+
+        df = pd.DataFrame(rows, columns=HOURLY_COLUMNS)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write every day in the range, empty days included, so they are not fetched again
+        for i in range((until - since).days + 1):
+            day = since + timedelta(days=i)
+            path = self.day_path(day)
+            df[df['date'] == day.isoformat()].to_csv(f"{path}.tmp", index=False)
+            os.replace(f"{path}.tmp", path)
+
+
+def fit_night_day_cpi(hourly, key, night_hours):
+    """
+    Night vs day spend and installs per object
+
+    key: 'adset_id' or 'campaign_id'; night_hours: boolean array of 24 hours
+    """
+    is_night = np.asarray(night_hours, dtype=bool)[hourly['hour'].to_numpy(dtype=int)]
+    period = np.where(is_night, 'night', 'day')
+
+    totals = hourly.groupby([hourly[key], period])[['spend', 'installs']].sum().unstack(fill_value=0)
+    totals.columns = [f"{period}_{metric}" for metric, period in totals.columns]
+    for column in ('night_spend', 'night_installs', 'day_spend', 'day_installs'):
+        if column not in totals:
+            totals[column] = 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        totals['night_cpi'] = totals['night_spend'] / totals['night_installs']
+        totals['day_cpi'] = totals['day_spend'] / totals['day_installs']
+    return totals
+
+
+class NightlyBudgetOptimizer:
+    def __init__(self, account, config, schedule):
+        self.settings = optimizer_settings(config)
+        self.nightly_amount = config['budgets']['nightly_amount']
+        self.timezone_name = config['timezone']
+        self.night_hours = schedule.reduced_hours()
+        # Hourly files are per account (data/hourly for the primary one)
+        cache_dir = namespaced_path(config, account['id'], self.settings['cache_dir'])
+        self.cache = HourlyInsightsCache(account, cache_dir, self.settings['install_action'])
+
+    def load_hourly(self, today):
+        until = today - timedelta(days=1)
+        since = until - timedelta(days=self.settings['lookback_days'] - 1)
+        return self.cache.load(since, until)
+
+    def nightly_budgets(self, items, originals=None, today=None):
+        """
+        Nightly budget (cents) for every fetched campaign / ad set, in item order
+
+        originals: the budgets daytime restores to, in item order (defaults to
+        the current budgets); fractions are taken of these, not of a budget
+        that may already be reduced
+        """
+        today = today or datetime.now(pytz.timezone(self.timezone_name)).date()
+        hourly = self.load_hourly(today)
+
+        if originals is None:
+            originals = [item['current_budget'] for item in items]
+        originals = np.array(originals, dtype=np.float64)
+        budgets = np.full(len(items), self.nightly_amount, dtype=np.int64)
+        if hourly.empty or not items:
+            print("  ⚠️  No hourly insights - using the flat nightly amount")
+            return budgets
+
+        fits = {
+            'campaign': fit_night_day_cpi(hourly, 'campaign_id', self.night_hours),
+            'adset': fit_night_day_cpi(hourly, 'adset_id', self.night_hours),
+        }
+
+        # Line every item up with its fit (NaN where the object has no data)
+        columns = ['night_cpi', 'day_cpi', 'day_installs']
+        matched = np.full((len(items), len(columns)), np.nan)
+        for obj_type, fit in fits.items():
+            positions = [i for i, item in enumerate(items) if item['type'] == obj_type]
+            ids = [items[i]['id'] for i in positions]
+            matched[positions] = fit.reindex(ids)[columns].to_numpy(dtype=np.float64)
+        night_cpi, day_cpi, day_installs = matched.T
+
+        fitted = (day_installs >= self.settings['min_installs']) & (day_cpi > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Night spend without installs is infinitely worse; no night spend is no reason to cut
+            ratio = np.where(np.isnan(night_cpi), 1.0, night_cpi / day_cpi)
+            fraction = np.clip(self.settings['max_cpi_ratio'] / ratio, self.settings['min_fraction'], 1.0)
+        optimized = np.maximum(np.round(originals * fraction), self.settings['min_amount']).astype(np.int64)
+        budgets = np.where(fitted, optimized, budgets)
+
+        kept = int((fitted & (fraction >= 1.0)).sum())
+        print(f"  📈 Nightly optimizer: {int(fitted.sum())} object(s) fitted "
+              f"({kept} kept at full budget), {int((~fitted).sum())} on the flat nightly amount")
+        return budgets
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Parquet store - typed, partitioned copies of the daily report CSVs
+
+Layout:
+    <data dir>/parquet/report=<report type>/date=YYYYMMDD/part-0.parquet
+
+(data/ for the primary account, data/<account id>/ for the others.)
+
+Report types follow the CSV file prefixes (ad_overview, ad_by_age,
+ad_by_gender, ad_by_placement, appsflyer_fb). Requires pyarrow; without it
+the writers print a warning and the CSVs remain the only copy.
+
+Usage:
+    python parquet_store.py convert     # convert every data/*.csv not yet in the store
+"""
+
+import os
+import sys
+import glob
+import pandas as pd
+from report_schema import report_file_parts, apply_types
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+DATA_DIR = 'data'
+PARQUET_DIR = os.path.join(DATA_DIR, 'parquet')
+
+_warned_missing = False
+
+
+def is_available():
+    """Check whether pyarrow is installed"""
+    global _warned_missing
+    if pq is None and not _warned_missing:
+        print("⚠️  pyarrow not installed - skipping Parquet files (pip install pyarrow)")
+        _warned_missing = True
+    return pq is not None
+
+
+def partition_path(report_type, date_str, parquet_dir=PARQUET_DIR):
+    """Path of the Parquet file for one report type and day"""
+    return os.path.join(parquet_dir, f'report={report_type}', f'date={date_str}', 'part-0.parquet')
+
+
+def write_partition(df, report_type, date_str, parquet_dir=PARQUET_DIR):
+    """Write one day of one report type as a typed Parquet partition"""
+    if not is_available() or df is None or df.empty:
+        return None
+
+    filepath = partition_path(report_type, date_str, parquet_dir)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    tmp_path = f"{filepath}.tmp"
+    apply_types(df.copy()).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, filepath)
+
+    return filepath
+
+
+def write_csv_partition(csv_path, overwrite=False):
+    """
+    Convert a <data dir>/<report>_<YYYYMMDD>.csv file into its Parquet partition
+
+    Partitions go under <data dir>/parquet, so per-account data directories
+    (data/<account id>/) get their own store.
+    """
+    if not is_available():
+        return None
+
+    parts = report_file_parts(csv_path)
+    if not parts:
+        return None
+
+    report_type, date_str = parts
+    parquet_dir = os.path.join(os.path.dirname(csv_path), 'parquet')
+    filepath = partition_path(report_type, date_str, parquet_dir)
+    if not overwrite and os.path.exists(filepath):
+        return filepath
+
+    # Read IDs as text so they are not mangled into floats
+    df = pd.read_csv(csv_path, dtype={col: str for col in ('campaign_id', 'adset_id', 'ad_id')})
+    return write_partition(df, report_type, date_str, parquet_dir)
+
+
+def list_partitions(report_type, since=None, until=None, data_dir=DATA_DIR):
+    """List (date_str, path) partitions for a report type, optionally within YYYYMMDD bounds"""
+    pattern = os.path.join(data_dir, 'parquet', f'report={report_type}', 'date=*', 'part-0.parquet')
+
+    partitions = []
+    for path in sorted(glob.glob(pattern)):
+        date_str = os.path.basename(os.path.dirname(path))[len('date='):]
+        if since and date_str < since:
+            continue
+        if until and date_str > until:
+            continue
+        partitions.append((date_str, path))
+
+    return partitions
+
+
+def load_reports(report_type, columns=None, since=None, until=None, data_dir=DATA_DIR):
+    """
+    Load a report type across days, reading only the requested columns
+
+    Args:
+        report_type: e.g. 'ad_overview', 'ad_by_age', 'appsflyer_fb'
+        columns: list of columns to read (None = all). Columns a day does not
+                 have come back as missing values.
+        since / until: inclusive YYYYMMDD partition bounds
+        data_dir: the account's data directory (accounts.data_dir_for)
+
+    Returns:
+        DataFrame with a 'date' column added (empty if nothing matches)
+    """
+    if not is_available():
+        return pd.DataFrame()
+
+    frames = []
+    for date_str, path in list_partitions(report_type, since, until, data_dir):
+        if columns is None:
+            df = pd.read_parquet(path)
+        else:
+            present = [col for col in columns if col in pq.read_schema(path).names]
+            df = pd.read_parquet(path, columns=present).reindex(columns=columns)
+        df['date'] = date_str
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=(columns or []) + ['date'])
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def convert_all(overwrite=False, data_dir=DATA_DIR):
+    """Convert every report CSV in data_dir into its Parquet store"""
+    if not is_available():
+        return []
+
+    converted = []
+    for csv_path in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+        filepath = write_csv_partition(csv_path, overwrite=overwrite)
+        if filepath:
+            converted.append(filepath)
+
+    print(f"✅ {len(converted)} Parquet partition(s) in {os.path.join(data_dir, 'parquet')}")
+    return converted
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != 'convert':
+        print(__doc__)
+        return
+
+    convert_all(overwrite='--overwrite' in sys.argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Prompt encoder - compact, token-efficient text for the LLM analysis prompts
+
+Instead of a '--- Row i ---' block with one 'key: value' line per cell, each
+report becomes one CSV table with the header written once:
+
+    - columns that are empty in every row are dropped, columns with the same
+      value in every row are listed once on a 'constant:' line
+    - campaign / ad set / ad names are dictionary-encoded (C1, S1, A1, ...)
+      with one NAMES legend for the whole prompt, so names repeated across
+      rows and days cost their tokens once
+    - IDs are dropped (the name codes identify the objects)
+    - numbers are rounded, nested action cells ([{'action_type': ..}]) are
+      reduced to their values
+
+Token counts per section are estimated with tiktoken when it is installed,
+otherwise at ~4 characters per token.
+"""
+
+import os
+import io
+import csv
+import ast
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Name columns dictionary-encoded into codes (column -> code prefix)
+NAME_COLUMNS = {'campaign_name': 'C', 'adset_name': 'S', 'ad_name': 'A'}
+
+# Dropped unless keep_ids=True
+ID_COLUMNS = ('campaign_id', 'adset_id', 'ad_id')
+
+CHARS_PER_TOKEN = 4
+
+FORMAT_NOTE = (
+    "FORMAT: one CSV table per report, header once. Campaign/ad set/ad names are coded "
+    "(C=campaign, S=ad set, A=ad; see NAMES). Columns with the same value in every row are "
+    "listed on the 'constant:' line; empty cells are not reported (0). Numbers are rounded.\n"
+)
+
+_encoding = None
+
+
+def encode_csv_text(filepath, encoder=None, max_rows=None):
+    """
+    Compact text for one report CSV (None if missing or empty)
+
+    With a shared encoder the name codes are resolved by the prompt's one
+    NAMES legend; without one the legend is appended to this section.
+    """
+    if encoder is not None:
+        return encoder.encode_csv(filepath, max_rows)
+
+    encoder = PromptEncoder()
+    text = encoder.encode_csv(filepath, max_rows)
+    return text + encoder.legend() if text else None
+
+
+def estimate_tokens(text):
+    """Token count of text (tiktoken if installed, else a characters/4 estimate)"""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding('o200k_base')
+        return len(_encoding.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def format_number(value, decimals=2):
+    """'43.333333' -> '43.33', '3.0' -> '3'; anything that is not a number is returned as-is"""
+    if not value or value[0] not in '-.0123456789':
+        return value
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    if number.is_integer():
+        return str(int(number))
+    return f"{number:.{decimals}f}".rstrip('0').rstrip('.')
+
+
+def compact_value(value, decimals=2):
+    """Round numbers and reduce nested action lists to 'value' or 'type=value;...'"""
+    if value.startswith("[{"):
+        try:
+            actions = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+        if len(actions) == 1:
+            return format_number(str(actions[0].get('value', '')), decimals)
+        return ';'.join(
+            f"{action.get('action_type')}={format_number(str(action.get('value', '')), decimals)}"
+            for action in actions
+        )
+    return format_number(value, decimals)
+
+
+class PromptEncoder:
+    """Encodes report CSVs for one prompt; name codes are shared by every section"""
+
+    def __init__(self, decimals=2, keep_ids=False):
+        self.decimals = decimals
+        self.keep_ids = keep_ids
+        self.codes = {column: {} for column in NAME_COLUMNS}
+        self.sections = []  # (label, estimated tokens)
+
+    def code_for(self, column, name):
+        codes = self.codes[column]
+        if name not in codes:
+            codes[name] = f"{NAME_COLUMNS[column]}{len(codes) + 1}"
+        return codes[name]
+
+    def add_section(self, label, text):
+        """Record the token estimate of a prompt section and return it unchanged"""
+        self.sections.append((label, estimate_tokens(text)))
+        return text
+
+    def encode_rows(self, title, rows, max_rows=None):
+        """One compact table for a list of row dicts (e.g. from csv.DictReader)"""
+        shown = rows[:max_rows] if max_rows else rows
+        columns = [col for col in rows[0] if self.keep_ids or col not in ID_COLUMNS]
+
+        # Encode column by column so constant and empty columns can be spotted
+        cells = {}
+        for col in columns:
+            values = [row.get(col) or '' for row in shown]
+            if col in NAME_COLUMNS:
+                cells[col] = [self.code_for(col, value) if value else '' for value in values]
+            else:
+                cells[col] = [compact_value(value, self.decimals) for value in values]
+
+        constants = []
+        table_columns = []
+        for col in columns:
+            distinct = set(cells[col])
+            if len(distinct) == 1:
+                value = distinct.pop()
+                if value:
+                    constants.append(f"{col}={value}")
+            else:
+                table_columns.append(col)
+
+        out = io.StringIO()
+        out.write(f"\n## {title}\nrows: {len(rows)}\n")
+        if constants:
+            out.write(f"constant: {', '.join(constants)}\n")
+
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(table_columns)
+        writer.writerows(zip(*(cells[col] for col in table_columns)))
+
+        if max_rows and len(rows) > max_rows:
+            out.write(f"... and {len(rows) - max_rows} more rows\n")
+
+        return self.add_section(title, out.getvalue())
+
+    def encode_csv(self, filepath, max_rows=None):
+        """Compact table for a report CSV (None if missing or empty)"""
+        if not os.path.exists(filepath):
+            return None
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+        if not rows:
+            return None
+
+        return self.encode_rows(os.path.basename(filepath), rows, max_rows)
+
+    def legend(self):
+        """NAMES section mapping every code used so far back to its name"""
+        lines = ["\n## NAMES\n"]
+        for column in NAME_COLUMNS:
+            lines.extend(f"{code}={name}\n" for name, code in self.codes[column].items())
+        return self.add_section('NAMES', ''.join(lines))
+
+    def token_report(self):
+        """Per-section token estimate lines, largest first, plus the total"""
+        method = 'tiktoken' if tiktoken is not None else f'~{CHARS_PER_TOKEN} chars/token'
+        lines = [f"  {label:<46} {tokens:>9,} tokens" for label, tokens in
+                 sorted(self.sections, key=lambda section: -section[1])]
+        total = f"Total ({method})"
+        lines.append(f"  {total:<46} {sum(t for _, t in self.sections):>9,} tokens")
+        return lines
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Report rollups - compact KPI cubes from the daily report CSVs for the analyzers
+
+Instead of raw ad rows, the analysis prompt gets pre-aggregated cubes over the
+last N days of all four report types:
+
+    account by day, campaigns by day          totals, KPIs, day-over-day change
+    ad sets, ads                              window totals, KPIs, last day vs window
+    age / gender / placement by day           from the breakdown reports
+    campaign x age / gender / placement       window totals
+
+KPIs: ctr = clicks / impressions (%), cpi = spend / installs,
+cpt = spend / trials, itr = trials / installs (%). Trials are not a flattened
+column; they are derived from the start_trial_total cost in
+cost_per_conversion (trials = spend / cost per trial).
+
+Usage:
+    python report_rollups.py [YYYYMMDD] [days]    # print the cubes (default: yesterday, 7 days)
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from report_schema import SchemaRegistry
+from parquet_store import load_reports
+
+DATA_DIR = 'data'
+
+# Breakdown report -> breakdown column
+BREAKDOWN_REPORTS = {
+    'ad_by_age': 'age',
+    'ad_by_gender': 'gender',
+    'ad_by_placement': 'publisher_platform',
+}
+
+# Additive metrics -> source column in the flattened CSVs
+BASE_METRICS = {
+    'spend': 'spend',
+    'impressions': 'impressions',
+    'clicks': 'clicks',
+    'installs': 'action_mobile_app_install',
+}
+
+ADDITIVE = ['spend', 'impressions', 'clicks', 'installs', 'trials']
+
+# Metrics whose day-over-day change (%) goes into the by-day cubes
+DELTA_METRICS = ['spend', 'cpi', 'cpt']
+
+NAME_KEYS = ['campaign_name', 'adset_name', 'ad_name']
+
+TRIAL_COST_PATTERN = r"'action_type': 'start_trial_total', 'value': '([0-9.]+)'"
+
+# Written for ratios with a zero denominator (e.g. cpt with no trials); never read as 0
+UNDEFINED = 'n/a'
+
+ROLLUP_NOTE = (
+    "ROLLUPS: ctr = clicks/impressions %, cpi = spend/installs, cpt = spend/trials (cost per trial), "
+    "itr = trials/installs % (install-to-trial). *_dod_pct = % change vs the previous day; "
+    "last_* = values on the most recent day of the window. n/a = ratio undefined because its "
+    "denominator is 0 (e.g. cpt with no trials) - it is not 0.\n"
+)
+
+
+def load_report(report_type, dates, data_dir=DATA_DIR):
+    """
+    One report type over several YYYYMMDD dates with a 'date' column (None if no files)
+
+    Days with a typed Parquet partition are read from it; the others fall back
+    to the CSV with the schema registry's dtypes.
+    """
+    schema = SchemaRegistry.for_data_dir(data_dir)
+    partitions = load_reports(report_type, since=min(dates), until=max(dates), data_dir=data_dir) if dates else None
+    by_date = dict(tuple(partitions.groupby('date', sort=False))) if partitions is not None and not partitions.empty else {}
+
+    frames = []
+    for date_str in dates:
+        path = os.path.join(data_dir, f'{report_type}_{date_str}.csv')
+        if date_str in by_date:
+            df = by_date[date_str].reset_index(drop=True)
+        elif os.path.exists(path):
+            df = schema.read_csv(path)
+        else:
+            continue
+        df['date'] = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+        frames.append(df)
+
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_metrics(df):
+    """Keys plus the additive metrics of a report frame (missing metrics are 0)"""
+    metrics = pd.DataFrame({'date': df['date']})
+    for col in NAME_KEYS + list(BREAKDOWN_REPORTS.values()):
+        if col in df.columns:
+            metrics[col] = df[col].astype('string').fillna('(none)')
+
+    for metric, source in BASE_METRICS.items():
+        metrics[metric] = pd.to_numeric(df[source], errors='coerce').fillna(0) if source in df.columns else 0.0
+
+    if 'cost_per_conversion' in df.columns:
+        trial_cost = pd.to_numeric(
+            df['cost_per_conversion'].astype('string').str.extract(TRIAL_COST_PATTERN)[0], errors='coerce'
+        ).astype('float64')
+        metrics['trials'] = (metrics['spend'] / trial_cost).round().fillna(0)
+    else:
+        metrics['trials'] = 0.0
+
+    return metrics
+
+
+def add_kpis(cube):
+    cube['ctr'] = cube['clicks'] / cube['impressions'] * 100
+    cube['cpi'] = cube['spend'] / cube['installs']
+    cube['cpt'] = cube['spend'] / cube['trials']
+    cube['itr'] = cube['trials'] / cube['installs'] * 100
+    return cube.replace([np.inf, -np.inf], np.nan)
+
+
+def rollup(metrics, keys, by_day=True):
+    """Sum the additive metrics by keys (and date) and derive the KPIs"""
+    group = keys + (['date'] if by_day else [])
+    if group:
+        cube = metrics.groupby(group, sort=True)[ADDITIVE].sum().reset_index()
+    else:
+        cube = metrics[ADDITIVE].sum().to_frame().T
+    return add_kpis(cube)
+
+
+def by_day(metrics, keys):
+    """keys x day cube with % change vs the key's previous day"""
+    cube = rollup(metrics, keys, by_day=True)
+    previous = cube.groupby(keys)[DELTA_METRICS].shift() if keys else cube[DELTA_METRICS].shift()
+    for metric in DELTA_METRICS:
+        cube[f'{metric}_dod_pct'] = (cube[metric] / previous[metric] - 1) * 100
+    return cube.replace([np.inf, -np.inf], np.nan)
+
+
+def window(metrics, keys, last_date):
+    """keys cube over the whole window plus the last day's spend, CPI and CPT"""
+    cube = rollup(metrics, keys, by_day=False)
+    last = rollup(metrics[metrics['date'] == last_date], keys, by_day=False)
+    last = last[keys + ['spend', 'cpi', 'cpt']].rename(
+        columns={'spend': 'last_spend', 'cpi': 'last_cpi', 'cpt': 'last_cpt'}
+    )
+    cube = cube.merge(last, on=keys, how='left')
+    # No rows on the last day is no spend; the ratios stay undefined
+    cube['last_spend'] = cube['last_spend'].fillna(0)
+    cube = cube[cube['spend'] > 0]
+    return cube.sort_values('spend', ascending=False)
+
+
+def window_dates(date_str, days):
+    """YYYYMMDD dates of the `days` days ending on date_str, oldest first"""
+    end = datetime.strptime(date_str, '%Y%m%d').date()
+    return [(end - timedelta(days=i)).strftime('%Y%m%d') for i in range(days - 1, -1, -1)]
+
+
+def build_cubes(date_str, days=7, data_dir=DATA_DIR, max_ads=50):
+    """
+    All prompt cubes for the `days` days ending on date_str (YYYYMMDD)
+
+    Returns:
+        list of (title, DataFrame, max_rows)
+    """
+    dates = window_dates(date_str, days)
+    last_date = datetime.strptime(date_str, '%Y%m%d').date().isoformat()
+
+    cubes = []
+    overview = load_report('ad_overview', dates, data_dir)
+    if overview is not None:
+        metrics = to_metrics(overview)
+        cubes.append(('Account by day', by_day(metrics, []), None))
+        campaigns = by_day(metrics, ['campaign_name'])
+        cubes.append(('Campaigns by day', campaigns[campaigns['spend'] > 0], None))
+        cubes.append(('Ad sets (window totals, last day)', window(metrics, NAME_KEYS[:2], last_date), None))
+        cubes.append(('Ads by spend (window totals, last day)', window(metrics, NAME_KEYS, last_date), max_ads))
+
+    for report_type, breakdown in BREAKDOWN_REPORTS.items():
+        report = load_report(report_type, dates, data_dir)
+        if report is None or breakdown not in report.columns:
+            continue
+        metrics = to_metrics(report)
+        cubes.append((f'{breakdown} by day', by_day(metrics, [breakdown]), None))
+        cubes.append((f'campaign x {breakdown} (window totals)',
+                      window(metrics, ['campaign_name', breakdown], last_date), None))
+
+    return [(title, cube, max_rows) for title, cube, max_rows in cubes if not cube.empty]
+
+
+def cube_rows(cube):
+    """DataFrame -> row dicts of strings for the prompt encoder (undefined ratios as n/a)"""
+    text = cube.round(2).astype(object).where(cube.notna(), UNDEFINED).astype(str)
+    return text.to_dict('records')
+
+
+def encode_cubes(cubes, encoder):
+    """Prompt text for build_cubes() output, one compact table per cube"""
+    return "".join(
+        encoder.encode_rows(title, cube_rows(cube), max_rows)
+        for title, cube, max_rows in cubes
+    )
+
+
+def main():
+    yesterday = (datetime.now().date() - timedelta(days=1)).strftime('%Y%m%d')
+    date_str = sys.argv[1] if len(sys.argv) > 1 else yesterday
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', 30)
+    for title, cube, max_rows in build_cubes(date_str, days):
+        print(f"\n📊 {title} ({len(cube)} rows)")
+        print(cube.head(max_rows or len(cube)).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
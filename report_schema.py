@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Report schema registry - stable, typed column layouts for the report CSVs
+
+Every report type (ad_overview, ad_by_age, ...) has an append-only list of
+columns in <data dir>/schema.json. A column's position in that list is its
+ordinal and never changes; new action types are appended at the end. Each
+column also carries the dtype of its first non-empty value ('float64' or
+'string'). A column that was empty when registered is marked "provisional"
+until a value shows up, and its dtype is inferred again from that value.
+
+Writers emit every registered column of a report in ordinal order (blank where
+a day has no value), so a new action type no longer shifts the other columns.
+Readers get the dtypes for pd.read_csv and can look columns up by name or
+ordinal instead of scanning headers.
+
+    {
+        "version": 1,
+        "reports": {
+            "ad_overview": [
+                {"name": "action_link_click", "dtype": "float64"},
+                ...
+            ]
+        }
+    }
+
+Usage:
+    python report_schema.py build [data_dir]   # register the columns of existing CSVs (oldest first)
+    python report_schema.py show [data_dir]    # print every report's columns with ordinals
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import threading
+import pandas as pd
+
+DATA_DIR = 'data'
+SCHEMA_FILENAME = 'schema.json'
+
+# ad_overview_20251121.csv -> ('ad_overview', '20251121')
+CSV_NAME_PATTERN = re.compile(r'^(?P<report>[a-z_]+)_(?P<date>\d{8})\.csv$')
+
+# Columns kept as text even when they look numeric (as is every *_id / *_name column)
+TEXT_COLUMNS = ('date_start', 'date_stop')
+
+# Flattened action columns are counts/costs even on a day they are empty
+NUMERIC_PREFIXES = ('action_', 'cpa_', 'video_')
+
+# One lock for every registry in the process: register() is read-modify-write on the file
+_lock = threading.Lock()
+
+
+def report_type_for(filename):
+    """Report type of a <report>_<YYYYMMDD>.csv file name (None for other files)"""
+    parts = report_file_parts(filename)
+    return parts[0] if parts else None
+
+
+def report_file_parts(filename):
+    """(report type, YYYYMMDD) of a <report>_<YYYYMMDD>.csv file name (None for other files)"""
+    match = CSV_NAME_PATTERN.match(os.path.basename(filename))
+    return (match.group('report'), match.group('date')) if match else None
+
+
+def is_text_column(name):
+    """IDs, names and dates stay text whatever their values look like"""
+    return name in TEXT_COLUMNS or name.endswith('_id') or name.endswith('_name')
+
+
+def parse_number(value):
+    """float(value), or None if it is not a number"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def infer_dtype(name, sample):
+    """dtype for a new column from its name and first non-empty value"""
+    if is_text_column(name):
+        return 'string'
+    if sample is None:
+        return 'float64' if name.startswith(NUMERIC_PREFIXES) else 'string'
+    return 'float64' if parse_number(sample) is not None else 'string'
+
+
+def to_value(name, value):
+    """One CSV cell typed by the same rule: None if empty, else a number or text"""
+    if value is None or value == '':
+        return None
+    if is_text_column(name):
+        return value
+    number = parse_number(value)
+    return value if number is None else number
+
+
+def apply_types(df):
+    """
+    Give the columns of a report DataFrame real dtypes by the same rule
+
+    Text columns become strings, everything that parses as a number becomes
+    numeric, so readers no longer need astype(float) at every use.
+    """
+    for col in df.columns:
+        if is_text_column(col):
+            df[col] = df[col].astype('string')
+            continue
+        if df[col].dtype == object:
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError, TypeError):
+                df[col] = df[col].astype('string')
+    return df
+
+
+def update_samples(samples, row):
+    """Record every key of a row dict and its first non-empty value"""
+    for key, value in row.items():
+        if samples.get(key) is None:
+            samples[key] = None if value is None or value == '' else value
+    return samples
+
+
+class SchemaRegistry:
+    def __init__(self, path=os.path.join(DATA_DIR, SCHEMA_FILENAME)):
+        self.path = path
+        self.reports = self.load()
+
+    @classmethod
+    def for_data_dir(cls, data_dir):
+        return cls(os.path.join(data_dir, SCHEMA_FILENAME))
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f).get('reports', {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 1, 'reports': self.reports}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def columns(self, report_type):
+        """Registered column names in ordinal order"""
+        return [column['name'] for column in self.reports.get(report_type, [])]
+
+    def dtypes(self, report_type):
+        """{column: dtype} for pd.read_csv"""
+        return {column['name']: column['dtype'] for column in self.reports.get(report_type, [])}
+
+    def ordinal(self, report_type, name):
+        """Stable position of a column (None if not registered)"""
+        for i, column in enumerate(self.reports.get(report_type, [])):
+            if column['name'] == name:
+                return i
+        return None
+
+    def register(self, report_type, samples):
+        """
+        Append any columns not registered yet and return the full column order
+
+        Args:
+            report_type: e.g. 'ad_overview'
+            samples: {column: first non-empty value or None}, used to pick the
+                     dtype of new columns
+
+        New columns are appended in sorted order; existing ones keep their
+        ordinal, and their dtype once it was inferred from a value.
+        """
+        with _lock:
+            # Re-read so concurrent writers (other accounts' threads, other processes) are not lost
+            self.reports = self.load()
+            registered = self.reports.setdefault(report_type, [])
+            known = {column['name'] for column in registered}
+
+            # A column first seen empty got a guessed dtype; its first value decides
+            retyped = 0
+            for column in registered:
+                if column.get('provisional') and samples.get(column['name']) is not None:
+                    column['dtype'] = infer_dtype(column['name'], samples[column['name']])
+                    del column['provisional']
+                    retyped += 1
+            
+            new = sorted(name for name in samples if name not in known)
+            for name in new:
+                column = {'name': name, 'dtype': infer_dtype(name, samples[name])}
+                if samples[name] is None:
+                    column['provisional'] = True
+                registered.append(column)
+            
+            if new or retyped:
+                self.save()
+            if new:
+                print(f"  🗂️  {report_type}: registered {len(new)} new column(s) in {self.path}")
+            if retyped:
+                print(f"  🗂️  {report_type}: typed {retyped} column(s) from their first value in {self.path}")
+
+            return [column['name'] for column in registered]
+
+    def read_csv(self, csv_path, columns=None):
+        """
+        Read a report CSV with its registered dtypes
+
+        Args:
+            columns: only read these columns (names missing from the file are skipped)
+
+        Falls back to an untyped read (IDs as text) if a value does not fit
+        its registered dtype.
+        """
+        report_type = report_type_for(csv_path)
+        dtypes = self.dtypes(report_type) if report_type else {}
+        usecols = (lambda col: col in columns) if columns is not None else None
+
+        try:
+            return pd.read_csv(csv_path, dtype=dtypes, usecols=usecols)
+        except ValueError as e:
+            print(f"  ⚠️  {os.path.basename(csv_path)} does not match {self.path} ({str(e)}) - reading untyped")
+            return pd.read_csv(
+                csv_path, usecols=usecols,
+                dtype={col: str for col in ('campaign_id', 'adset_id', 'ad_id')}
+            )
+
+
+def build(data_dir=DATA_DIR):
+    """Register the columns of every report CSV in data_dir, oldest day first"""
+    registry = SchemaRegistry.for_data_dir(data_dir)
+    paths = [path for path in glob.glob(os.path.join(data_dir, '*.csv')) if report_type_for(path)]
+    paths.sort(key=lambda path: report_file_parts(path)[1])
+
+    for path in paths:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        samples = {col: next((value for value in df[col] if value != ''), None) for col in df.columns}
+        registry.register(report_type_for(path), samples)
+
+    print(f"✅ {len(registry.reports)} report type(s) in {registry.path}")
+    return registry
+
+
+def show(data_dir=DATA_DIR):
+    registry = SchemaRegistry.for_data_dir(data_dir)
+    for report_type, columns in sorted(registry.reports.items()):
+        print(f"\n📋 {report_type} ({len(columns)} columns)")
+        for i, column in enumerate(columns):
+            print(f"  {i:>3}  {column['name']:<60} {column['dtype']}")
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'show'):
+        print(__doc__)
+        return
+
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else DATA_DIR
+    if sys.argv[1] == 'build':
+        build(data_dir)
+    else:
+        show(data_dir)
+
+
+if __name__ == "__main__":
+    main()
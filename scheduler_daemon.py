@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Scheduler daemon - keeps the budget scheduler running in one process
+
+Instead of a cron/GitHub Actions cold start per run, the daemon builds one
+BudgetScheduler per account at startup (API session, state store and account
+snapshot stay in memory) and sleeps until the next schedule transition from
+config.json, computed in the configured timezone so it stays correct across
+DST. Shortly before each transition it prefetches the account, so at the
+boundary only the budget updates are sent. config.json is reloaded when it
+changes on disk (e.g. after manage_scheduler.py edits).
+
+Usage:
+    python scheduler_daemon.py                  # run until SIGINT/SIGTERM
+    python scheduler_daemon.py --prefetch 120   # fetch accounts 120s before each transition
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from budget_scheduler_v2 import BudgetScheduler
+from accounts import get_accounts
+
+# Never sleep longer than this in one go, so suspend/clock jumps are noticed
+MAX_SLEEP_SECONDS = 60
+
+
+class SchedulerDaemon:
+    def __init__(self, config_path='config.json', prefetch_seconds=60):
+        self.config_path = config_path
+        self.prefetch_seconds = prefetch_seconds
+        self.stop_event = threading.Event()
+        self.load()
+
+    def load(self):
+        """(Re)build one scheduler per configured account"""
+        self.config_mtime = os.path.getmtime(self.config_path)
+        with open(self.config_path, 'r') as f:
+            config = json.load(f)
+
+        self.accounts = get_accounts(config)
+        self.max_workers = config.get('account_workers', 4)
+        self.schedulers = [BudgetScheduler(self.config_path, account=account) for account in self.accounts]
+        print(f"🔧 Loaded {len(self.schedulers)} account(s) from {self.config_path}")
+
+    def reload_if_changed(self):
+        if os.path.getmtime(self.config_path) != self.config_mtime:
+            print(f"🔄 {self.config_path} changed - reloading")
+            self.load()
+
+    def for_each_scheduler(self, task):
+        """Run task(scheduler) for every account in parallel; one failure does not stop the rest"""
+        def run(scheduler):
+            try:
+                return task(scheduler)
+            except Exception as e:
+                print(f"❌ [{scheduler.account_name}] {str(e)}")
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(self.schedulers)))) as pool:
+            return list(pool.map(run, self.schedulers))
+
+    def next_transition(self):
+        """Earliest upcoming transition across all accounts, as a unix timestamp"""
+        return min(
+            scheduler.schedule.next_transition(datetime.now(scheduler.timezone)).timestamp()
+            for scheduler in self.schedulers
+        )
+
+    def sleep_until(self, timestamp):
+        """Sleep until timestamp; returns False if the daemon was asked to stop"""
+        while not self.stop_event.is_set():
+            remaining = timestamp - time.time()
+            if remaining <= 0:
+                return True
+            self.stop_event.wait(min(remaining, MAX_SLEEP_SECONDS))
+        return False
+
+    def stop(self, *args):
+        print("\n🛑 Stopping scheduler daemon...")
+        self.stop_event.set()
+
+    def serve_forever(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        # Catch up on whatever the schedule says right now
+        self.for_each_scheduler(lambda scheduler: scheduler.run())
+
+        while not self.stop_event.is_set():
+            transition = self.next_transition()
+            print(f"\n⏰ Next transition at {datetime.fromtimestamp(transition).astimezone().isoformat()}")
+
+            if not self.sleep_until(transition - self.prefetch_seconds):
+                break
+            self.reload_if_changed()
+            transition = self.next_transition()
+            self.for_each_scheduler(lambda scheduler: scheduler.prefetch_objects())
+
+            if not self.sleep_until(transition):
+                break
+            started = time.time()
+            self.for_each_scheduler(lambda scheduler: scheduler.run())
+            print(f"⚡ Transition applied {started - transition:.3f}s after the boundary "
+                  f"(run took {time.time() - started:.1f}s)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the budget scheduler as a long-running process")
+    parser.add_argument('--config', default='config.json', help="config file (default: config.json)")
+    parser.add_argument('--prefetch', type=int, default=60,
+                        help="seconds before each transition to fetch the accounts (default: 60)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        SchedulerDaemon(args.config, args.prefetch).serve_forever()
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,9 @@ Test script to simulate the full scheduler cycle
 
 import json
 import os
+from datetime import datetime
 from budget_scheduler_v2 import BudgetScheduler
+from budget_state_store import create_state_store
 
 def reset_state():
     """Reset the state file to force a fresh run"""
@@ -16,6 +18,10 @@ def reset_state():
     }
     with open('budget_state.json', 'w') as f:
         json.dump(state, f, indent=2)
+    
+    # The journal would otherwise replay the old originals on top of the reset
+    if os.path.exists('budget_state.journal'):
+        os.remove('budget_state.journal')
     print("✅ State file reset\n")
 
 def simulate_nightly():
@@ -31,7 +37,7 @@ def simulate_nightly():
     print("\n📊 Fetching active campaigns and ad sets...")
     updates = scheduler.apply_nightly_budgets()
     
-    scheduler.state['last_mode'] = 'nightly'
+    scheduler.store.set_mode('nightly', datetime.now(scheduler.timezone).isoformat())
     scheduler.save_state()
     
     print(f"\n✅ Nightly simulation complete: {len(updates)} budget(s) processed")
@@ -51,7 +57,7 @@ def simulate_daytime():
     print("\n📊 Fetching active campaigns and ad sets...")
     updates = scheduler.apply_daytime_budgets()
     
-    scheduler.state['last_mode'] = 'daytime'
+    scheduler.store.set_mode('daytime', datetime.now(scheduler.timezone).isoformat())
     scheduler.save_state()
     
     print(f"\n✅ Daytime simulation complete: {len(updates)} budget(s) processed")
@@ -64,8 +70,9 @@ def show_state():
     print("📋 CURRENT STATE")
     print("=" * 80)
     
-    with open('budget_state.json', 'r') as f:
-        state = json.load(f)
+    with open('config.json', 'r') as f:
+        backend = json.load(f).get('state_backend', 'journal')
+    state = create_state_store(backend).state
     
     print(f"\nLast Mode: {state.get('last_mode', 'None')}")
     print(f"Last Run: {state.get('last_run', 'Never')}")